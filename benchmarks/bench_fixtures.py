@@ -0,0 +1,259 @@
+"""
+Offline benchmarks of the scraping hot paths, on the pages in fixtures/.
+
+    python benchmarks/bench_fixtures.py [--repeat N] [--save FILE] [--compare FILE]
+
+Measures the throughput of loading a Group, a Submission and a status
+page, and of parsing result tables, plus the memory kept per loaded
+object. The pages are served from the fixtures by a requests adapter, so
+no network is used. The extracted data is checked first, so a parser
+that breaks fails instead of getting faster.
+
+With --save the results are written as a baseline; with --compare the
+run fails (exit status 1) if anything got slower than the baseline by
+more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from temmies.course import Course
+from temmies.group import Group
+from temmies.results import parse_results
+from temmies.submission import Submission
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE = "https://themis.housing.rug.nl"
+COURSE = "/2024-2025/example-course"
+ASSIGNMENT = f"{COURSE}/week1/exercise1"
+SUBMISSION = (
+    "/submission/2024-2025/example-course/week1/exercise1/@submissions/s0000000/s0000000-3"
+)
+
+
+def fixture(name: str) -> bytes:
+    """
+    Contents of a fixture.
+    """
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class FixtureAdapter(BaseAdapter):
+    """
+    Answers requests from the fixtures instead of the network.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pages = {
+            f"{BASE}/api/navigation{COURSE}": ("navigation.json", "application/json"),
+            f"{BASE}/course{COURSE}": ("course.html", "text/html"),
+            f"{BASE}/course{ASSIGNMENT}": ("assignment.html", "text/html"),
+            f"{BASE}/stats{ASSIGNMENT}": ("status.html", "text/html"),
+            f"{BASE}{SUBMISSION}": ("submission.html", "text/html"),
+        }
+        self.bodies = {url: fixture(name) for url, (name, _) in self.pages.items()}
+
+    def send(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        if request.url in self.pages:
+            response.status_code = 200
+            response.headers["Content-Type"] = self.pages[request.url][1]
+            response._content = self.bodies[request.url]  # pylint: disable=protected-access
+        else:
+            response.status_code = 404
+            response._content = b""  # pylint: disable=protected-access
+        return response
+
+    def close(self):
+        pass
+
+
+def offline_session() -> requests.Session:
+    """
+    A session served by FixtureAdapter.
+    """
+    session = requests.Session()
+    session.mount("https://", FixtureAdapter())
+    return session
+
+
+def load_group(session) -> Group:
+    """
+    Load an assignment and read what a download or submit needs.
+    """
+    group = Group(session, ASSIGNMENT, "Exercise 1", None, submitable=True).load()
+    group.get_test_cases()
+    group.get_files()
+    return group
+
+
+def load_course(session) -> Course:
+    """
+    Load a course and list its items through the navigation API.
+    """
+    course = Course(session, COURSE, "Example Course", None)
+    course.get_items()
+    return course
+
+
+def load_status(session) -> dict:
+    """
+    Read the status of an assignment (the linked submission is not fetched).
+    """
+    return load_group(session).get_status()
+
+
+def load_submission(session) -> Submission:
+    """
+    Load a submission and read its details.
+    """
+    submission = Submission(SUBMISSION, session).load()
+    submission.get_test_cases()
+    submission.get_info()
+    return submission
+
+
+def expect(condition: bool, what: str) -> None:
+    """
+    Fail if a check does not hold (unlike assert, also under -O).
+    """
+    if not condition:
+        raise AssertionError(f"Fixture check failed: {what}")
+
+
+def check(session) -> None:
+    """
+    Make sure the fixtures are still extracted correctly
+    (tests/test_fixtures.py checks the same in detail).
+    """
+    group = load_group(session)
+    expect(len(group.get_test_cases()) == 20, "test cases")
+    expect([f["title"] for f in group.get_files()] == ["skeleton.c", "Makefile"], "files")
+    expect(len(load_course(session).get_items()) == 9, "course items")
+    status = load_status(session)
+    expect(set(status) >= {"leading", "best", "latest", "first_pass", "last_pass"}, "status")
+    expect(status["leading"] is status["best"], "shared submissions")
+    submission = load_submission(session)
+    expect(len(submission.get_test_cases()) == 10, "submission cases")
+    expect(submission.get_files()[0][0] == "main.c", "submission files")
+    expect(parse_results(fixture("result_queued.html").decode()) == ({}, False), "queued")
+    expect(not parse_results(fixture("result_pending.html").decode())[1], "pending")
+    results, done = parse_results(fixture("result_done.html").decode())
+    expect(done and results[9] is False and results[10] is None, "done")
+
+
+def throughput(fn, repeat: int, number: int = 50) -> float:
+    """
+    Best calls per second of `fn` over `repeat` rounds of `number` calls.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (perf_counter() - start) / number)
+    return 1 / best
+
+
+def memory_per_object(fn, count: int = 200) -> float:
+    """
+    Bytes (as seen by tracemalloc) kept alive per object returned by `fn`.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [fn() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def run(repeat: int) -> dict[str, dict[str, float]]:
+    """
+    Run all benchmarks.
+    """
+    session = offline_session()
+    check(session)
+
+    results = {}
+    for name, fn in (
+        ("group", lambda: load_group(session)),
+        ("course", lambda: load_course(session)),
+        ("status", lambda: load_status(session)),
+        ("submission", lambda: load_submission(session)),
+    ):
+        results[name] = {
+            "per_second": throughput(fn, repeat),
+            "bytes_per_object": memory_per_object(fn),
+        }
+
+    for state in ("queued", "pending", "done"):
+        html = fixture(f"result_{state}.html").decode()
+        results[f"results_{state}"] = {
+            "per_second": throughput(lambda html=html: parse_results(html), repeat),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    The benchmarks that are slower than the baseline by more than `tolerance`.
+    """
+    return [
+        f"{name}: {values['per_second']:.0f}/s vs {baseline[name]['per_second']:.0f}/s"
+        for name, values in results.items()
+        if name in baseline
+        and values["per_second"] < baseline[name]["per_second"] * (1 - tolerance)
+    ]
+
+
+def main():
+    """
+    Run the benchmarks and report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="FILE", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="fail on regressions against FILE")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'benchmark':<16} {'per second':>12} {'KiB/object':>12}")
+    for name, values in results.items():
+        memory = values.get("bytes_per_object")
+        memory = f"{memory / 1024:12.1f}" if memory is not None else f"{'':>12}"
+        print(f"{name:<16} {values['per_second']:12.0f} {memory}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Compare the lxml/XPath extraction of group pages with the previous
+BeautifulSoup implementation, on synthetic pages of growing size.
+
+    python benchmarks/bench_parsing.py [--repeat N]
+
+Needs beautifulsoup4 for the reference implementation.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from json import loads
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from temmies.parsing import GroupPage  # pylint: disable=wrong-import-position
+
+
+def make_page(items: int, noise: int) -> str:
+    """
+    An assignment page with `items` children, test cases and downloads,
+    padded with `noise` unrelated navigation entries.
+    """
+    crumbs = "".join(
+        f'<a class="fill accent large" href="/course/2024-2025/c/g{i}">Group {i}</a>'
+        for i in range(4)
+    )
+    nav = "".join(
+        f'<li class="nav"><a href="/course/other/{i}"><span>Other {i}</span></a></li>'
+        for i in range(noise)
+    )
+    children = "".join(
+        f'<a href="/course/2024-2025/c/g3/{i}" class="ass-submitable">Exercise {i}</a>'
+        for i in range(items)
+    )
+    tests = "".join(
+        f'<div class="cfg-line"><a href="/file/2024-2025/c/g3/%40tests/{i}.in">{i}.in</a></div>'
+        for i in range(items)
+    )
+    downloads = "".join(
+        f'<a href="/file/2024-2025/c/g3/%40files/f{i}.txt">f{i}.txt</a>' for i in range(items)
+    )
+    return (
+        f"<html><head><script>{'var x = 1;' * noise}</script></head><body>"
+        f"<ul>{nav}</ul>{crumbs}"
+        f'<div class="ass-children">{children}</div>'
+        f'<div id="details-1"><div class="cfg-line"><span class="cfg-key">Downloads</span>'
+        f'<span class="cfg-val">{downloads}</span></div></div>'
+        f'<div class="subsec round shade"><h4 class="info">Test cases</h4>{tests}</div>'
+        '<a href="/stats/2024-2025/c/g3">Status</a>'
+        '<form action="/submit/2024-2025/c/g3" data-suffixes=\'{".py": "python"}\'></form>'
+        "</body></html>"
+    )
+
+
+def soup_extract(html: str) -> dict:  # pylint: disable=too-many-locals
+    """
+    The previous extraction: a full BeautifulSoup tree, searched with find_all.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    crumbs = [
+        (a.get("href", ""), a.get_text(strip=True))
+        for a in soup.find_all("a", class_="fill accent large")
+    ]
+    section = soup.find("div", class_="ass-children")
+    items = [
+        {
+            "visible": True,
+            "submitable": "ass-submitable" in x.get("class", []),
+            "title": x.text.strip(),
+            "path": x["href"],
+        }
+        for x in section.find_all("a", href=True)
+    ] if section else []
+    tcs = []
+    for div in soup.find_all("div", class_="subsec round shade"):
+        res = div.find("h4", class_="info")
+        if res and "Test cases" in res.text:
+            for case in div.find_all("div", class_="cfg-line"):
+                link = case.find("a")
+                if link:
+                    tcs.append({"title": link.text.strip(), "path": link["href"]})
+    files = []
+    details = soup.find("div", id=lambda x: x and x.startswith("details"))
+    for line in details.find_all("div", class_="cfg-line") if details else []:
+        key = line.find("span", class_="cfg-key")
+        if key and "Downloads" in key.text.strip():
+            for val in line.find_all("span", class_="cfg-val"):
+                for link in val.find_all("a"):
+                    files.append({"title": link.text.strip(), "path": link["href"]})
+    form = soup.find("form")
+    status = soup.find("a", string="Status")
+    return {
+        "breadcrumbs": crumbs,
+        "items": items,
+        "test_cases": tcs,
+        "files": files,
+        "form": {"action": form["action"], "suffixes": loads(form.get("data-suffixes", "{}"))}
+        if form else None,
+        "status_href": status["href"] if status else None,
+    }
+
+
+def xpath_extract(html: str) -> dict:
+    """
+    The current extraction.
+    """
+    page = GroupPage.from_html(html)
+    return {name: getattr(page, name) for name in (
+        "breadcrumbs", "items", "test_cases", "files", "form", "status_href"
+    )}
+
+
+def measure(fn, html: str, repeat: int) -> tuple[float, float]:
+    """
+    Best time (ms) over `repeat` runs and peak memory (KiB) of one run.
+    Memory is what tracemalloc sees: Python objects, not the C tree of lxml.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        fn(html)
+        best = min(best, perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+
+def main():
+    """
+    Run the comparison.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'page':>14} {'KiB':>7} | {'bs4 ms':>8} {'bs4 KiB':>8} | "
+          f"{'lxml ms':>8} {'lxml KiB':>8} | speedup")
+    for items, noise in ((10, 50), (50, 500), (200, 2000), (500, 10000)):
+        html = make_page(items, noise)
+        if soup_extract(html) != xpath_extract(html):
+            raise SystemExit(f"Extractions differ for {items} items / {noise} noise.")
+
+        soup_ms, soup_kib = measure(soup_extract, html, args.repeat)
+        xpath_ms, xpath_kib = measure(xpath_extract, html, args.repeat)
+        print(
+            f"{f'{items}/{noise}':>14} {len(html) / 1024:7.0f} | "
+            f"{soup_ms:8.2f} {soup_kib:8.0f} | {xpath_ms:8.2f} {xpath_kib:8.0f} | "
+            f"{soup_ms / xpath_ms:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Check that `import temmies` stays within an import-time budget, and that
+it does not pull in the modules that are only needed to log in.
+
+    python benchmarks/import_time.py [--budget-ms MS] [--runs N]
+
+Each run imports temmies in a fresh interpreter with `-X importtime`;
+the median is compared with the budget. Exits with status 1 if the
+budget is exceeded or a deferred module was imported.
+tests/test_import_time.py runs the same checks under pytest.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Only imported once a login actually happens
+DEFERRED = ("selenium", "keyring", "httpx")
+
+# Default budget for the median import time, in milliseconds
+BUDGET_MS = 250.0
+
+CHECK = (
+    "import sys, temmies; "
+    f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+)
+
+
+def import_once() -> tuple[float, list[str]]:
+    """
+    Import temmies in a new interpreter.
+    Returns the cumulative import time (ms) and the deferred modules it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHECK],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | package"
+    total = next(
+        int(line.split("|")[1]) for line in result.stderr.splitlines()
+        if line.rstrip().endswith("| temmies")
+    )
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total / 1000, loaded
+
+
+def main():
+    """
+    Run the check.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    times, loaded = [], set()
+    for _ in range(args.runs):
+        ms, modules = import_once()
+        times.append(ms)
+        loaded.update(modules)
+
+    median = statistics.median(times)
+    print(f"import temmies: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(times):.1f}, max {max(times):.1f}), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported {', '.join(sorted(loaded))}, which should be deferred")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
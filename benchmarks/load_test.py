@@ -0,0 +1,141 @@
+"""
+Load test of temmies against the local stand-in (standin.py).
+
+    python benchmarks/load_test.py [--clients N] [--latency S] [--error-rate F] [--expire-after S]
+
+Starts the stand-in and runs N concurrent clients, each with its own
+Themis instance. Every client logs in (browserless), crawls the course,
+downloads all test cases and files, reads the status of every assignment
+and submits a file to one. Reports the p50/p95 time of each phase, the
+errors, and what the stand-in served (requests, logins, expired sessions,
+injected errors).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import traceback
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from standin import COURSE, Config, StandinServer
+from temmies.results import Backoff
+from temmies.themis import Themis
+
+PHASES = ("login", "crawl", "download", "status", "submit")
+
+
+class Client(Themis):  # pylint: disable=too-few-public-methods
+    """
+    Themis logging in to the stand-in, without the keyring.
+    """
+
+    def _get_password(self) -> str:
+        return "password"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    The `fraction` percentile of `values` (nearest rank).
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def scenario(url: str, number: int, timings: dict[str, list[float]], errors: list[str]):
+    """
+    What one client does; the time of each phase is appended to `timings`.
+    """
+    def timed(phase, fn):
+        start = perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[phase].append(perf_counter() - start)
+
+    try:
+        themis = timed("login", lambda: Client(
+            user=f"s{number:07d}", browserless=True, base_url=url
+        ))
+        course = themis.get_by_path(COURSE)
+        assignments = timed("crawl", lambda: [
+            item for item in course.walk() if item.submitable
+        ])
+        with tempfile.TemporaryDirectory() as dest:
+            result = timed("download", lambda: course.download_all(dest))
+            errors.extend(f"download {f['url']}: {f['error']}" for f in result.failed)
+            timed("status", lambda: [a.get_status(text=True) for a in assignments])
+
+            source = os.path.join(dest, "solution.py")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("print(input())\n")
+            results = timed("submit", lambda: assignments[number % len(assignments)].submit(
+                [source], backoff=Backoff(0.2, 1.0), timeout=60
+            ))
+            if not results or not all(results.values()):
+                errors.append(f"client {number}: unexpected results {results}")
+        themis.close()
+    except Exception:  # pylint: disable=broad-exception-caught
+        errors.append(f"client {number}: {traceback.format_exc(limit=-3)}")
+
+
+def run(clients: int, config: Config) -> tuple[dict, list[str], dict[str, int], float]:
+    """
+    Run `clients` concurrent clients against a stand-in configured by `config`.
+    """
+    server = StandinServer(config).start()
+    timings: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    errors: list[str] = []
+    threads = [
+        threading.Thread(target=scenario, args=(server.url, n, timings, errors))
+        for n in range(clients)
+    ]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+    server.stop()
+    return timings, errors, server.stats.counts, elapsed
+
+
+def main():
+    """
+    Run the load test and report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--expire-after", type=float, default=None)
+    parser.add_argument("--judge-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    timings, errors, counts, elapsed = run(args.clients, Config(
+        latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        expire_after=args.expire_after, judge_delay=args.judge_delay,
+    ))
+
+    print(f"{args.clients} clients in {elapsed:.2f}s")
+    print(f"{'phase':<10} {'runs':>6} {'p50 (s)':>9} {'p95 (s)':>9} {'mean (s)':>9}")
+    for phase in PHASES:
+        values = timings[phase]
+        if values:
+            print(f"{phase:<10} {len(values):6} {percentile(values, 0.5):9.3f} "
+                  f"{percentile(values, 0.95):9.3f} {statistics.mean(values):9.3f}")
+    print("server: " + ", ".join(f"{key}={value}" for key, value in sorted(counts.items())))
+    print(f"errors: {len(errors)}")
+    for error in errors:
+        print(f"  {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
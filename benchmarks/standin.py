@@ -0,0 +1,507 @@
+"""
+A local stand-in for Themis, serving the endpoints temmies uses:
+
+- /api/navigation/... listings and /course/... pages of a generated course
+- test case and file downloads, with ETags (If-None-Match gets a 304)
+- the submission form, and result pages that go from queued to done
+- a SAML login (Themis on 127.0.0.1, the identity provider on localhost)
+  that temmies' browserless login can complete
+
+Latency, error rates and session expiry (redirects to /login) are
+configurable, to exercise temmies at scale without the real server.
+
+    python benchmarks/standin.py [--port 8080] [--latency 0.05] [--error-rate 0.01]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+YEAR = "2024-2025"
+COURSE = f"/{YEAR}/standin"
+
+
+@dataclass
+class Config:  # pylint: disable=too-many-instance-attributes
+    """
+    Behaviour of the stand-in.
+    - latency: seconds added to every response, varied by +-`jitter` (a fraction)
+    - error_rate: fraction of requests answered with a 503 and Retry-After
+    - throttle_rate: fraction of requests answered with a 429 and Retry-After
+    - expire_after: seconds a login stays valid (None: forever)
+    - password: the only password accepted (None: any)
+    - two_factor: ask for a one-time code after the password
+    - judge_delay: seconds before a submission is judged
+    - groups, assignments, test_cases, file_size: size of the generated course
+    """
+    latency: float = 0.0
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    expire_after: float | None = None
+    password: str | None = None
+    two_factor: bool = False
+    judge_delay: float = 1.0
+    groups: int = 4
+    assignments: int = 5
+    test_cases: int = 4
+    file_size: int = 1024
+
+
+class Stats:  # pylint: disable=too-few-public-methods
+    """
+    Counters of what the stand-in served.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+
+    def count(self, what: str) -> None:
+        """
+        Count an event.
+        """
+        with self.__lock:
+            self.counts[what] = self.counts.get(what, 0) + 1
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    The stand-in. start() serves it from a background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Config | None = None, port: int = 0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.config = config or Config()
+        self.stats = Stats()
+        self.sessions: dict[str, float] = {}
+        self.submissions: dict[str, float] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of Themis (the identity provider is at localhost on the same port).
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def idp_url(self) -> str:
+        """
+        Base URL of the identity provider.
+        """
+        return f"http://localhost:{self.server_address[1]}"
+
+    def start(self) -> "StandinServer":
+        """
+        Serve in a daemon thread.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving.
+        """
+        self.shutdown()
+        self.server_close()
+
+    def login(self) -> str:
+        """
+        Start a new session.
+        """
+        token = secrets.token_hex(8)
+        with self.lock:
+            self.sessions[token] = time.monotonic()
+        self.stats.count("logins")
+        return token
+
+    def authenticated(self, token: str | None) -> bool:
+        """
+        Whether a session token is (still) valid.
+        """
+        with self.lock:
+            started = self.sessions.get(token)
+        if started is None:
+            return False
+        expire_after = self.config.expire_after
+        return expire_after is None or time.monotonic() - started < expire_after
+
+    # The generated course
+
+    def children(self, path: str) -> list[dict] | None:
+        """
+        Navigation API entries under a path, or None if it does not exist.
+        """
+        config = self.config
+        if path == f"/{YEAR}":
+            return [self.entry(COURSE, "Stand-in Course", False)]
+        if path == COURSE:
+            return [
+                self.entry(f"{COURSE}/group{g}", f"Group {g}", False)
+                for g in range(1, config.groups + 1)
+            ]
+        parts = path[len(COURSE):].strip("/").split("/")
+        if len(parts) == 1 and self.group_number(parts[0]) is not None:
+            return [
+                self.entry(f"{path}/ex{a}", f"Exercise {a}", True)
+                for a in range(1, config.assignments + 1)
+            ]
+        if self.is_assignment(path):
+            return []
+        return None
+
+    @staticmethod
+    def entry(path: str, title: str, submitable: bool) -> dict:
+        """
+        A navigation API entry.
+        """
+        return {"visible": True, "submitable": submitable, "title": title, "path": path}
+
+    def group_number(self, name: str) -> int | None:
+        """
+        Number of a group from its name, if it exists.
+        """
+        if name.startswith("group") and name[5:].isdigit():
+            number = int(name[5:])
+            if 1 <= number <= self.config.groups:
+                return number
+        return None
+
+    def is_assignment(self, path: str) -> bool:
+        """
+        Whether a path is an assignment.
+        """
+        parts = path[len(COURSE):].strip("/").split("/") if path.startswith(COURSE) else []
+        return (
+            len(parts) == 2 and self.group_number(parts[0]) is not None
+            and parts[1].startswith("ex") and parts[1][2:].isdigit()
+            and 1 <= int(parts[1][2:]) <= self.config.assignments
+        )
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Request handler of the stand-in.
+    """
+
+    server: StandinServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    # Helpers
+
+    def reply(
+        self, status: int, body: bytes | str = b"",
+        content_type: str = "text/html; charset=utf-8", headers: dict | None = None
+    ) -> None:
+        """
+        Send a response. Successful GETs get an ETag, and a 304 if it matches.
+        """
+        if isinstance(body, str):
+            body = body.encode()
+        headers = dict(headers or {})
+        if self.command == "GET" and status == 200:
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self.server.stats.count("304")
+                status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location: str, headers: dict | None = None) -> None:
+        """
+        Send a 303 redirect.
+        """
+        self.reply(303, headers={"Location": location, **(headers or {})})
+
+    def form(self) -> dict[str, str]:
+        """
+        Fields of a posted urlencoded form (multipart bodies are just read).
+        """
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "urlencoded" not in self.headers.get("Content-Type", ""):
+            return {}
+        return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+    def token(self) -> str | None:
+        """
+        Session token from the cookies.
+        """
+        for cookie in self.headers.get("Cookie", "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "session":
+                return value
+        return None
+
+    def disturb(self) -> bool:
+        """
+        Apply the configured latency and errors. Returns True if an error was sent.
+        """
+        config = self.server.config
+        if config.latency:
+            time.sleep(config.latency * (1 + random.uniform(-config.jitter, config.jitter)))
+        roll = random.random()
+        if roll < config.throttle_rate:
+            self.server.stats.count("429")
+            self.reply(429, "Too many requests", headers={"Retry-After": str(config.retry_after)})
+            return True
+        if roll < config.throttle_rate + config.error_rate:
+            self.server.stats.count("503")
+            self.reply(503, "Unavailable", headers={"Retry-After": str(config.retry_after)})
+            return True
+        return False
+
+    # Routing
+
+    def do_GET(self):  # pylint: disable=invalid-name, too-many-return-statements
+        """
+        Route a GET request.
+        """
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        self.server.stats.count("requests")
+        if path == "/login" or path.startswith("/idp/"):
+            return self.saml_get(path)
+        if self.disturb():
+            return None
+        if not self.server.authenticated(self.token()):
+            self.server.stats.count("expired")
+            return self.redirect("/login")
+
+        if path.startswith("/api/navigation"):
+            return self.navigation(path[len("/api/navigation"):])
+        if path.startswith("/course/"):
+            return self.page(path[len("/course"):])
+        if path.startswith("/file/"):
+            return self.file(path)
+        if path.startswith("/stats/"):
+            return self.status(path[len("/stats"):])
+        if path.startswith("/result/"):
+            return self.result(path)
+        return self.reply(404, f"Cannot GET {path}")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Route a POST request.
+        """
+        path = unquote(urlsplit(self.path).path)
+        self.server.stats.count("requests")
+        if path.startswith("/idp/") or path == "/saml/acs":
+            return self.saml_post(path, self.form())
+        self.form()
+        if self.disturb():
+            return None
+        if not self.server.authenticated(self.token()):
+            self.server.stats.count("expired")
+            return self.redirect("/login")
+        if path.startswith("/submit/") and self.server.is_assignment(path[len("/submit"):]):
+            submission = str(next(self.server.ids))
+            with self.server.lock:
+                self.server.submissions[submission] = time.monotonic()
+            self.server.stats.count("submissions")
+            return self.redirect(f"/result{path[len('/submit'):]}/@submissions/{submission}")
+        return self.reply(404, f"Cannot POST {path}")
+
+    # Login: Themis -> identity provider -> Themis
+
+    def saml_get(self, path: str) -> None:
+        """
+        Start of the login flow.
+        """
+        if path == "/login":
+            return self.reply(200, (
+                f'<form method="post" action="{self.server.idp_url}/idp/sso">'
+                '<input type="hidden" name="SAMLRequest" value="request"></form>'
+                "<script>document.forms[0].submit()</script>"
+            ))
+        return self.reply(404, "")
+
+    def saml_post(self, path: str, fields: dict[str, str]) -> None:
+        """
+        Identity provider and assertion consumer.
+        """
+        credentials = (
+            '<form method="post" action="/idp/sso">'
+            '<input name="Ecom_User_ID"><input type="password" name="Ecom_Password"></form>'
+        )
+        if path == "/idp/sso" and "SAMLRequest" in fields:
+            return self.reply(200, credentials)
+        config = self.server.config
+        if (
+            path == "/idp/sso" and fields.get("Ecom_User_ID") and fields.get("Ecom_Password")
+            and config.password in (None, fields["Ecom_Password"])
+        ):
+            if config.two_factor:
+                return self.reply(200, (
+                    '<form method="post" action="/idp/otp"><input name="otp"></form>'
+                ))
+            return self.reply(200, (
+                f'<form method="post" action="{self.server.url}/saml/acs">'
+                '<input type="hidden" name="SAMLResponse" value="response"></form>'
+                "<script>document.forms[0].submit()</script>"
+            ))
+        if path == "/idp/sso":
+            return self.reply(200, credentials)
+        if path == "/saml/acs" and fields.get("SAMLResponse"):
+            token = self.server.login()
+            return self.redirect("/", {"Set-Cookie": f"session={token}; Path=/; HttpOnly"})
+        return self.reply(400, "Bad SAML message")
+
+    # Themis
+
+    def navigation(self, path: str) -> None:
+        """
+        Navigation API.
+        """
+        path = "/" + path.strip("/")
+        if path == "/":
+            return self.reply(200, json.dumps([{"visible": True, "path": f"/{YEAR}"}]),
+                              "application/json")
+        children = self.server.children(path)
+        if children is None:
+            return self.reply(404, "[]", "application/json")
+        return self.reply(200, json.dumps(children), "application/json")
+
+    def page(self, path: str) -> None:
+        """
+        Page of a course, group or assignment.
+        """
+        path = "/" + path.strip("/")
+        children = self.server.children(path)
+        if children is None:
+            return self.reply(404, f"Cannot GET /course{path}")
+
+        parts = path.strip("/").split("/")
+        crumbs = "".join(
+            f'<a class="fill accent large" href="/course/{"/".join(parts[:i + 1])}">'
+            f"{parts[i]}</a>"
+            for i in range(len(parts))
+        )
+        body = [f"<html><body><div class='breadcrumbs'>{crumbs}</div>"]
+        if children:
+            links = "".join(
+                f'<a href="/course{c["path"]}" '
+                f'class="{"ass-submitable" if c["submitable"] else "ass-group"}">{c["title"]}</a>'
+                for c in children
+            )
+            body.append(f'<div class="ass-children">{links}</div>')
+        if self.server.is_assignment(path):
+            cases = "".join(
+                f'<div class="cfg-line">'
+                f'<a href="/file{path}/%40tests/{n}.{ext}">{n}.{ext}</a></div>'
+                for n in range(1, self.server.config.test_cases + 1) for ext in ("in", "out")
+            )
+            body.append(
+                f'<div id="details-{parts[-1]}"><div class="cfg-line">'
+                '<span class="cfg-key">Downloads:</span><span class="cfg-val">'
+                f'<a href="/file{path}/%40files/skeleton.py">skeleton.py</a></span></div></div>'
+                f'<div class="subsec round shade"><h4 class="info">Test cases</h4>{cases}</div>'
+                f'<form action="/submit{path}" method="post" '
+                """data-suffixes='{".py": "python"}'></form>"""
+                f'<a href="/stats{path}">Status</a>'
+            )
+        body.append("</body></html>")
+        return self.reply(200, "".join(body))
+
+    def file(self, path: str) -> None:
+        """
+        Test case or file download.
+        """
+        assignment = path[len("/file"):].split("/@")[0]
+        if not self.server.is_assignment(assignment):
+            return self.reply(404, f"Cannot GET {path}")
+        size = self.server.config.file_size
+        content = (path.encode() * (size // len(path) + 1))[:size]
+        return self.reply(200, content, "application/octet-stream")
+
+    def status(self, path: str) -> None:
+        """
+        Status page of an assignment.
+        """
+        if not self.server.is_assignment(path):
+            return self.reply(404, f"Cannot GET /stats{path}")
+        link = f"/submission{path}/@submissions/s0000000/1"
+        lines = "".join(
+            f'<div class="cfg-line"><span class="cfg-key">{key}:</span>'
+            f'<span class="cfg-val"><a href="{link}">passed</a></span></div>'
+            for key in ("Leading", "Best", "Latest", "First pass", "Last pass")
+        )
+        return self.reply(
+            200, f'<html><body><div class="cfg-container">{lines}</div></body></html>'
+        )
+
+    def result(self, path: str) -> None:
+        """
+        Result page of a submission: queued until judge_delay has passed.
+        """
+        submission = path.rsplit("/", 1)[-1]
+        with self.server.lock:
+            submitted = self.server.submissions.get(submission)
+        if submitted is None:
+            return self.reply(404, f"Cannot GET {path}")
+
+        judged = time.monotonic() - submitted >= self.server.config.judge_delay
+        rows = "".join(
+            f'<tr class="sub-casetop"><td class="sub-casename">{n}</td>'
+            + ('<td class="status-icon passed">Passed</td>' if judged
+               else '<td class="status-icon queued">Queued</td>')
+            + "</tr>"
+            for n in range(1, self.server.config.test_cases + 1)
+        )
+        return self.reply(200, (
+            '<html><body><div class="sub-cases"><div class="cfg-container">'
+            f"<table>{rows}</table></div></div></body></html>"
+        ))
+
+
+def main():
+    """
+    Run the stand-in in the foreground.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--expire-after", type=float, default=None)
+    parser.add_argument("--judge-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = StandinServer(Config(
+        latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        expire_after=args.expire_after, judge_delay=args.judge_delay,
+    ), args.port)
+    print(f"Serving Themis at {server.url} (identity provider at {server.idp_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats.counts, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,9 +24,11 @@ setup(
         "urllib3",
         "requests",
         "lxml",
-        "beautifulsoup4",
         "keyring",
         "selenium",
     ],
+    extras_require={
+        "async": ["httpx"],
+    },
     python_requires=">=3.9",
 )
\ No newline at end of file
@@ -0,0 +1,477 @@
+"""
+Asynchronous client, mirroring Themis, Year, Course, Group and Submission.
+Requires the optional httpx dependency (pip install temmies[async]).
+"""
+
+import asyncio
+import os
+import tempfile
+from typing import Any, AsyncIterator
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .download import FILE_MODE, DownloadResult
+from .exceptions import SessionExpired
+from .parsing import (
+    GroupPage, SubmissionPage, parse, parse_status
+)
+from .registry import IdentityMap
+from .results import SYMBOLS, Backoff, new_results, parse_results, poll_delays
+from .session import BASE_URL
+from .submission import package_files
+
+
+def _login_required(response: "httpx.Response") -> bool:
+    """
+    Whether Themis sent a response to the login, directly or through redirects.
+    """
+    urls = [response.url, *(r.url for r in response.history)]
+    return any(url.path.startswith("/login") or "signon.rug.nl" in url.host for url in urls)
+
+
+def _session_expired() -> SessionExpired:
+    """
+    The error for a request that was sent to the login.
+    """
+    return SessionExpired(
+        "Session expired. Refresh the cookies with Themis and create a new AsyncThemis."
+    )
+
+
+class AsyncThemis:
+    """
+    Asynchronous entry point, sharing one pooled httpx.AsyncClient.
+
+    It does not log in by itself: it reuses the cookies of an authenticated
+    Themis instance, or cookies saved with Themis.get_session_cookies().
+    Use it as an async context manager, or call close() when done.
+    """
+
+    def __init__(self, themis=None, cookies: dict | None = None, max_connections: int = 20):
+        if httpx is None:
+            raise ImportError("AsyncThemis requires httpx: pip install temmies[async]")
+
+        self.base_url = themis.base_url if themis is not None else BASE_URL
+        jar = {}
+        headers = {}
+        if themis is not None:
+            jar.update(themis.session.cookies.get_dict())
+            headers["User-Agent"] = themis.session.headers.get("User-Agent", "")
+        jar.update(cookies or {})
+
+        self.client = httpx.AsyncClient(
+            cookies=jar,
+            headers=headers,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=30,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Close all connections.
+        """
+        await self.client.aclose()
+
+    async def _get(self, url: str) -> "httpx.Response":
+        """
+        GET a URL, raising SessionExpired if Themis sends us to the login.
+        """
+        response = await self.client.get(url)
+        if _login_required(response):
+            raise _session_expired()
+        return response
+
+    async def _get_page(self, url: str, what: str, extract=GroupPage.from_html):
+        """
+        GET a page and extract its data with `extract(html)`.
+        Parsing runs in a thread to keep the event loop free.
+        """
+        response = await self._get(url)
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve page for '{what}'.")
+        return await asyncio.to_thread(extract, response.text)
+
+    def get_year(self, start_year: int = None, end_year: int = None) -> "AsyncYear":
+        """
+        Gets an AsyncYear object using the year path (e.g., 2023, 2024).
+        """
+        return AsyncYear(self, f"{start_year}-{end_year}")
+
+    async def all_years(self) -> list["AsyncYear"]:
+        """
+        Gets all visible years as AsyncYear objects.
+        """
+        response = await self._get(f"{self.base_url}/api/navigation/")
+        if response.status_code != 200:
+            raise ConnectionError("Failed to retrieve years from Themis API.")
+
+        return [
+            AsyncYear(self, year_info["path"].strip("/"))
+            for year_info in response.json()
+            if year_info.get("visible", False)
+        ]
+
+
+class AsyncYear:
+    """
+    Asynchronous counterpart of Year.
+    """
+
+    def __init__(self, themis: AsyncThemis, year_path: str):
+        self.themis = themis
+        self.year_path = year_path
+        self.base_url = themis.base_url
+        self.api_url = f"{self.base_url}/api/navigation/{self.year_path}"
+
+    async def all_courses(self) -> list["AsyncCourse"]:
+        """
+        Gets all visible courses in this year.
+        """
+        response = await self.themis._get(self.api_url)  # pylint: disable=protected-access
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve courses for {self.year_path}.")
+
+        return [
+            AsyncCourse(self.themis, course_info["path"], course_info["title"], self)
+            for course_info in response.json()
+            if course_info.get("visible", False)
+        ]
+
+    async def get_course(self, course_title: str) -> "AsyncCourse":
+        """
+        Gets a course by its title.
+        """
+        for course in await self.all_courses():
+            if course.title == course_title:
+                return course
+        raise ValueError(f"Course '{course_title}' not found in year {self.year_path}.")
+
+    async def get_course_by_tag(self, course_tag: str) -> "AsyncCourse":
+        """
+        Gets a course by its tag (course identifier).
+        """
+        course = AsyncCourse(self.themis, f"/{self.year_path}/{course_tag}", "", self)
+        await course.load()
+        if not course.title:
+            raise ValueError(
+                f"Could not retrieve course title for tag '{course_tag}' in year {self.year_path}."
+            )
+        return course
+
+    def __str__(self):
+        return f"AsyncYear({self.year_path})"
+
+
+class AsyncGroup:  # pylint: disable=too-many-instance-attributes
+    """
+    Asynchronous counterpart of Group.
+    The page is fetched on first use, like Group.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __init__(
+        self, themis: AsyncThemis, path: str, title: str,
+        parent=None, submitable: bool = False
+    ):
+        self.themis = themis
+        self.path = path
+        self.title = title
+        self.parent = parent
+        self.submitable = submitable
+        self.base_url = themis.base_url
+
+        self.url = f"{self.base_url}/course{IdentityMap.canonical(path)}"
+        self.api_url = f"{self.base_url}/api/navigation{IdentityMap.canonical(path)}"
+        self._group_page: GroupPage | None = None
+        self.__lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Whether the page of this group has been fetched and parsed.
+        """
+        return self._group_page is not None
+
+    async def load(self, force: bool = False) -> "AsyncGroup":
+        """
+        Fetch and parse the page of this group.
+        """
+        async with self.__lock:
+            if self._group_page is None or force:
+                # pylint: disable=protected-access
+                self._group_page = await self.themis._get_page(self.url, self.title)
+                if not self.title:
+                    self.title = self._group_page.title or self.path.split("/")[-1]
+        return self
+
+    async def _page(self) -> GroupPage:
+        await self.load()
+        return self._group_page
+
+    async def get_items(self) -> list["AsyncGroup"]:
+        """
+        Get all items (groups and assignments) under this group.
+        Uses the navigation API, falling back to scraping the page.
+        """
+        response = await self.themis._get(self.api_url)  # pylint: disable=protected-access
+        items_data = None
+        if response.status_code == 200:
+            try:
+                items_data = response.json()
+            except ValueError:
+                items_data = None
+        if not isinstance(items_data, list):
+            items_data = (await self._page()).items
+
+        return [
+            AsyncGroup(
+                self.themis, item_data["path"], item_data["title"],
+                self, item_data.get("submitable", False)
+            )
+            for item_data in items_data
+            if item_data.get("visible", False)
+        ]
+
+    async def get_item_by_title(self, title: str) -> "AsyncGroup":
+        """
+        Get a single item by its title, case-insensitive, or by the last part of its path.
+        """
+        for item in await self.get_items():
+            if item.title.lower() == title.lower() or item.path.split("/")[-1] == title:
+                return item
+        raise ValueError(f"Item '{title}' not found under {self.title}.")
+
+    async def get_test_cases(self) -> list[dict[str, str]]:
+        """
+        Get all test cases for this assignment.
+        """
+        if not self.submitable:
+            raise ValueError(f"No test cases for non-submittable item '{self.title}'.")
+        return (await self._page()).test_cases
+
+    async def get_files(self) -> list[dict[str, str]]:
+        """
+        Get all downloadable files for this assignment.
+        """
+        return (await self._page()).files
+
+    async def get_status(self, text: bool = False) -> dict[str, Any] | None:
+        """
+        Get the status of the current group, if available.
+        Linked submissions are given as AsyncSubmission unless `text` is set.
+        """
+        status_href = (await self._page()).status_href
+        if not status_href:
+            raise ValueError("Status information is not available for this group.")
+
+        # pylint: disable=protected-access
+        lines = await self.themis._get_page(
+            f"{self.base_url}{status_href}", self.title, lambda html: parse_status(parse(html))
+        )
+        if lines is None:
+            return None
+
+        parsed = {}
+        submissions: dict[str, AsyncSubmission] = {}
+        for key, (value, href) in lines.items():
+            if href and not text:
+                href = href.replace(self.base_url, "")
+                if href not in submissions:
+                    submissions[href] = AsyncSubmission(self.themis, href)
+                parsed[key] = submissions[href]
+            else:
+                parsed[key] = value
+        return parsed
+
+    async def download_tcs(self, path: str = ".", concurrency: int = 4) -> DownloadResult:
+        """
+        Download all test cases for this assignment.
+        """
+        return await self.__download(await self.get_test_cases(), path, concurrency)
+
+    async def download_files(self, path: str = ".", concurrency: int = 4) -> DownloadResult:
+        """
+        Download all files available for this assignment.
+        """
+        return await self.__download(await self.get_files(), path, concurrency)
+
+    async def __download(
+        self, entries: list[dict[str, str]], path: str, concurrency: int
+    ) -> DownloadResult:
+        """
+        Stream the given test cases or files into `path`, `concurrency` at a time.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(entry: dict[str, str]) -> Exception | None:
+            url = f"{self.base_url}{entry['path']}"
+            destination = os.path.join(path, entry['title'])
+            async with semaphore:
+                try:
+                    await self.__stream(url, destination)
+                # An expired session fails every file, but not the whole call
+                except (OSError, httpx.HTTPError, SessionExpired) as e:
+                    return e
+            return None
+
+        errors = await asyncio.gather(*(fetch(entry) for entry in entries))
+        result = DownloadResult()
+        for entry, error in zip(entries, errors):
+            destination = os.path.join(path, entry['title'])
+            if error is None:
+                result.append(destination)
+            else:
+                result.failed.append({
+                    "title": entry['title'],
+                    "url": f"{self.base_url}{entry['path']}",
+                    "destination": destination,
+                    "error": error,
+                })
+        return result
+
+    async def __stream(self, url: str, destination: str) -> None:
+        """
+        Stream a file to a temporary file, then rename it into place.
+        Raises SessionExpired, without writing anything, if Themis sent the
+        request to the login.
+        """
+        async with self.themis.client.stream("GET", url) as response:
+            if _login_required(response):
+                raise _session_expired()
+            if response.status_code != 200:
+                raise ConnectionError(f"Failed to download '{url}' ({response.status_code}).")
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destination) or ".",
+                                       prefix=".", suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+                os.chmod(tmp, FILE_MODE)
+                os.replace(tmp, destination)
+            except BaseException:
+                os.remove(tmp)
+                raise
+
+    # pylint: disable=too-many-locals
+    async def submit(
+        self,
+        files: list[str],
+        judge: bool = True,
+        wait: bool = True,
+        silent: bool = True,
+        sudo: str | None = None,
+        backoff: Backoff | None = None,
+        timeout: float | None = None,
+    ) -> dict[int, bool | None] | str | None:
+        """
+        Submit files to this assignment.
+        Returns a dictionary of test case results, or the submission URL if wait is False.
+        Use iter_results on the URL to get each test case as soon as it is judged.
+        """
+        if not self.submitable:
+            raise ValueError(f"Cannot submit to non-submittable item '{self.title}'.")
+
+        form = (await self._page()).form
+        if not form:
+            raise ValueError("Submission form not found.")
+
+        url = f"{self.base_url}{form['action']}" + (f"?sudo={sudo}" if sudo else "")
+        files = [files] if isinstance(files, str) else files
+        packaged_files, data = package_files(files, form["suffixes"], judge)
+
+        if not silent:
+            print(f"Submitting to {self.title}")
+            for file in files:
+                print(f"• {file}")
+
+        resp = await self.themis.client.post(url, files=packaged_files, data=data)
+        if _login_required(resp):
+            raise _session_expired()
+        result_url = str(resp.url)
+
+        if not wait or not judge:
+            return result_url if "@submissions" in result_url else None
+
+        results: dict[int, bool | None] = {}
+        async for case, result in self.iter_results(result_url, backoff, timeout):
+            results[case] = result
+            if not silent:
+                print(f"Case {case}: {SYMBOLS[result]}")
+        return results
+
+    async def iter_results(
+        self, url: str, backoff: Backoff | None = None, timeout: float | None = None
+    ) -> AsyncIterator[tuple[int, bool | None]]:
+        """
+        Yield (case, result) for each test case of a submission as soon as
+        it has been judged, polling the result page with `backoff`.
+        """
+        seen: set[int] = set()
+        for delay in poll_delays(url, backoff, timeout):
+            await asyncio.sleep(delay)
+
+            # pylint: disable=protected-access
+            results, done = await self.themis._get_page(url, url, parse_results)
+            for case, result in new_results(results, seen):
+                yield case, result
+            if done:
+                return
+
+    def __str__(self):
+        return f"AsyncGroup({self.title}, submitable={self.submitable})"
+
+
+class AsyncCourse(AsyncGroup):
+    """
+    Asynchronous counterpart of Course.
+    """
+
+    def __str__(self):
+        return f"AsyncCourse({self.title})"
+
+
+class AsyncSubmission:
+    """
+    Asynchronous counterpart of Submission. The page is fetched on first use.
+    """
+
+    def __init__(self, themis: AsyncThemis, url: str):
+        self.themis = themis
+        self.url = themis.base_url + url
+        self.__page: SubmissionPage | None = None
+
+    async def load(self) -> "AsyncSubmission":
+        """
+        Fetch and parse the submission page.
+        """
+        if self.__page is None:
+            # pylint: disable=protected-access
+            self.__page = await self.themis._get_page(
+                self.url, self.url, SubmissionPage.from_html
+            )
+        return self
+
+    async def get_test_cases(self) -> dict[str, str]:
+        """Get a dict of test cases status"""
+        await self.load()
+        return dict(self.__page.cases)
+
+    async def get_info(self) -> dict[str, Any] | None:
+        """Submission information (in details)"""
+        await self.load()
+        return self.__page.info
+
+    async def get_files(self) -> list | None:
+        """Get a list of uploaded files in the format [(name, url)]"""
+        info = await self.get_info()
+        return info.get("files", None) if info else None
@@ -0,0 +1,312 @@
+"""
+On-disk HTTP cache for Themis navigation and group pages.
+"""
+
+import atexit
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from json import dump, load
+from time import monotonic, time
+from urllib.parse import urlsplit
+
+from requests import Request, Response
+from requests.structures import CaseInsensitiveDict
+
+
+def conditional_headers(entry: dict) -> dict[str, str]:
+    """
+    If-None-Match/If-Modified-Since headers for a stored 'etag' and 'last_modified'.
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+class HTTPCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Stores response bodies on disk, keyed by URL.
+
+    Entries younger than `ttl` seconds are served without touching the
+    network; older ones are revalidated with If-None-Match/If-Modified-Since.
+    The cache is capped at `max_size` bytes, evicting the least recently
+    used entries first.
+
+    Pages are served without checking who asks for them, so a cache must
+    not be shared between accounts: with a `namespace` (e.g. the username)
+    the entries are kept in a subdirectory of their own.
+
+    The index (entries and access order) is kept in memory and written at
+    most every FLUSH_INTERVAL seconds when it changed, when entries are
+    invalidated or cleared, and on `close` or exit. Bodies that did not
+    make it into the index (e.g. the process was killed) are removed on
+    startup.
+    The directory is only accessible by its owner, as pages can be private.
+    """
+
+    INDEX = "index.json"
+    FLUSH_INTERVAL = 30
+    # Only pages that change rarely are cached; status and result pages are not.
+    PREFIXES = ("/api/navigation", "/course/")
+    CONTENT_TYPES = ("text/html", "application/json")
+
+    def __init__(
+        self, directory: str, ttl: float = 300, max_size: int = 64 * 1024 * 1024,
+        namespace: str | None = None
+    ):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        if namespace:
+            self.directory = os.path.join(
+                self.directory, hashlib.sha256(namespace.encode()).hexdigest()[:16]
+            )
+        self.ttl = ttl
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+        # Whether the index on disk is behind, and when it was last written
+        self.__dirty = False
+        self.__written = monotonic()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.__index: OrderedDict[str, dict] = self.__read_index()
+        self.__size = sum(entry["size"] for entry in self.__index.values())
+        self.__remove_orphans()
+        self.__evict()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def __read_index(self) -> OrderedDict:
+        """
+        Load the index from disk, dropping entries whose body is gone.
+        """
+        try:
+            with open(os.path.join(self.directory, self.INDEX), encoding="utf-8") as f:
+                entries = load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+
+        index = OrderedDict()
+        for entry in sorted(entries, key=lambda e: e.get("accessed", 0)):
+            if os.path.exists(self.__body_path(entry["url"])):
+                index[entry["url"]] = entry
+        return index
+
+    def __remove_orphans(self) -> None:
+        """
+        Remove the bodies that are not in the index.
+        """
+        known = {os.path.basename(self.__body_path(url)) for url in self.__index}
+        for name in os.listdir(self.directory):
+            if len(name) == 64 and name not in known:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def __changed(self) -> None:
+        """
+        The index changed: write it if it was last written FLUSH_INTERVAL ago.
+        Call with the lock held.
+        """
+        self.__dirty = True
+        if monotonic() - self.__written >= self.FLUSH_INTERVAL:
+            self.__write_index()
+
+    def __write_index(self) -> None:
+        """
+        Atomically write the index to disk.
+        """
+        path = os.path.join(self.directory, self.INDEX)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            dump(list(self.__index.values()), f)
+        os.replace(tmp, path)
+        self.__dirty = False
+        self.__written = monotonic()
+
+    def flush(self) -> None:
+        """
+        Write the index if the access order or freshness changed since it was written.
+        """
+        with self.__lock:
+            if self.__dirty:
+                self.__write_index()
+
+    def close(self) -> None:
+        """
+        Persist the index; the cache can still be used afterwards.
+        """
+        self.flush()
+
+    def __body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the cached bodies in bytes.
+        """
+        return self.__size
+
+    def accepts(self, url: str) -> bool:
+        """
+        Whether responses for this URL may be cached.
+        """
+        path = urlsplit(url).path
+        return path.startswith(self.PREFIXES) and "@submissions" not in path
+
+    def lookup(self, url: str) -> dict | None:
+        """
+        Get the cache entry for a URL, if any.
+        """
+        with self.__lock:
+            entry = self.__index.get(url)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry: dict) -> bool:
+        """
+        Whether an entry can be used without revalidation.
+        """
+        return time() - entry["stored"] < self.ttl
+
+    def conditional_headers(self, entry: dict) -> dict[str, str]:
+        """
+        Headers to revalidate an entry with.
+        """
+        return conditional_headers(entry)
+
+    def store(self, url: str, response: Response) -> None:
+        """
+        Cache a successful response for a URL.
+        """
+        content_type = (response.headers.get("Content-Type") or "").lower()
+        if not content_type.startswith(self.CONTENT_TYPES):
+            return
+        if "no-store" in (response.headers.get("Cache-Control") or ""):
+            return
+
+        body = response.content
+        # Written outside the lock, so other threads are not held up
+        path = self.__body_path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        with self.__lock:
+            now = time()
+            previous = self.__index.get(url)
+            if previous:
+                self.__size -= previous["size"]
+            self.__size += len(body)
+            self.__index[url] = {
+                "url": url,
+                "size": len(body),
+                "stored": now,
+                "accessed": now,
+                "content_type": response.headers.get("Content-Type"),
+                "encoding": response.encoding,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self.__index.move_to_end(url)
+            self.__evict()
+            self.__changed()
+
+    def revalidated(self, url: str) -> None:
+        """
+        Mark an entry as fresh again after a 304 response.
+        """
+        with self.__lock:
+            entry = self.__index.get(url)
+            if entry:
+                entry["stored"] = time()
+                self.__dirty = True
+
+    def respond(self, url: str, request: Request | None = None) -> Response | None:
+        """
+        Build a response from the cached body of a URL.
+        """
+        with self.__lock:
+            entry = self.__index.get(url)
+            if not entry:
+                return None
+            try:
+                with open(self.__body_path(url), "rb") as f:
+                    body = f.read()
+            except OSError:
+                del self.__index[url]
+                self.__size -= entry["size"]
+                self.__dirty = True
+                return None
+            entry["accessed"] = time()
+            self.__index.move_to_end(url)
+            self.__changed()
+
+        response = Response()
+        response.status_code = 200
+        response.url = url
+        response.request = request
+        response.encoding = entry["encoding"]
+        response._content = body  # pylint: disable=protected-access
+        response.headers = CaseInsensitiveDict({
+            key: value for key, value in (
+                ("Content-Type", entry["content_type"]),
+                ("ETag", entry["etag"]),
+                ("Last-Modified", entry["last_modified"]),
+            ) if value
+        })
+        return response
+
+    def invalidate(self, url: str) -> None:
+        """
+        Drop the entry for a URL.
+        """
+        with self.__lock:
+            entry = self.__index.pop(url, None)
+            if entry:
+                self.__size -= entry["size"]
+                self.__remove_body(url)
+                self.__write_index()
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        """
+        with self.__lock:
+            for url in self.__index:
+                self.__remove_body(url)
+            self.__index.clear()
+            self.__size = 0
+            self.__write_index()
+
+    def __remove_body(self, url: str) -> None:
+        try:
+            os.remove(self.__body_path(url))
+        except OSError:
+            pass
+
+    def __evict(self) -> None:
+        """
+        Drop least recently used entries until the cache fits in max_size.
+        """
+        while self.__size > self.max_size and self.__index:
+            url, entry = self.__index.popitem(last=False)
+            self.__size -= entry["size"]
+            self.__remove_body(url)
+            self.__dirty = True
+
+
+def _flush_at_exit(ref: weakref.ref) -> None:
+    """
+    Write the index of a cache that is still in use when the interpreter exits.
+    """
+    cache = ref()
+    if cache is not None:
+        cache.flush()
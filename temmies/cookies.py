@@ -0,0 +1,106 @@
+"""
+Persistent storage of session cookies, so a login can be reused across runs.
+"""
+
+import os
+from contextlib import contextmanager
+from json import dump, load
+from time import time
+from typing import Any, Iterator
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking
+    fcntl = None
+
+
+class CookieStore:
+    """
+    Cookies kept in a JSON file that only the owner can read (mode 0600).
+
+    Reads and writes take an exclusive lock on <path>.lock, so several
+    processes sharing the file (e.g. cron jobs) never see it half-written.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+
+    @contextmanager
+    def __locked(self) -> Iterator[None]:
+        """
+        Hold the lock on the store.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Also releases the lock
+
+    def load(self) -> RequestsCookieJar | None:
+        """
+        Read the stored cookies, leaving out those that have expired.
+        Returns None if nothing (readable) is stored.
+        """
+        with self.__locked():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    entries: list[dict[str, Any]] = load(f)
+            except (OSError, ValueError):
+                return None
+
+        jar = RequestsCookieJar()
+        now = time()
+        for entry in entries:
+            if entry.get("expires") is not None and entry["expires"] <= now:
+                continue
+            jar.set_cookie(create_cookie(**entry))
+        return jar
+
+    def save(self, jar: RequestsCookieJar) -> None:
+        """
+        Atomically replace the stored cookies with those in `jar`.
+        """
+        entries = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+                "expires": cookie.expires,
+            }
+            for cookie in jar
+        ]
+        with self.__locked():
+            tmp = f"{self.path}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                dump(entries, f, indent=1)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """
+        Remove the stored cookies.
+        """
+        with self.__locked():
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def expires_at(jar: RequestsCookieJar) -> float | None:
+    """
+    Earliest expiry (as a timestamp) of the cookies in `jar`,
+    or None if they all last for the session.
+    """
+    expiries = [cookie.expires for cookie in jar if cookie.expires is not None]
+    return min(expiries) if expiries else None
@@ -3,8 +3,17 @@ Represents a course.
 A course is a group that contains exercises or other groups.
 """
 
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .download import DownloadCallback, DownloadPool, DownloadResult
+from .sync import Sync, SyncResult
 from .group import Group
 from .exercise_group import ExerciseGroup
+from .exceptions import SessionExpired
+from .registry import IdentityMap
+from .status import COLUMNS, StatusMatrix
 
 class Course(Group):
     """
@@ -18,6 +27,120 @@ class Course(Group):
     def __str__(self):
         return f"Course({self.title})"
 
+    def download_all(
+        self,
+        dest: str = ".",
+        include: tuple[str, ...] = ("tcs", "files"),
+        concurrency: int = 8,
+        callback: DownloadCallback | None = None,
+    ) -> DownloadResult:
+        """
+        Mirror the test cases ("tcs") and/or files ("files") of every assignment
+        in this course to dest/<group path>/, e.g. dest/labs/lab1/1.in.
+        Pages and files are fetched by one pool of `concurrency` workers.
+        """
+        pool = DownloadPool(self.session, concurrency, callback)
+        self.__mirror(pool, dest, include)
+        return pool.wait()
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def sync(
+        self,
+        dest: str = ".",
+        include: tuple[str, ...] = ("tcs", "files"),
+        concurrency: int = 8,
+        delete: bool = False,
+        callback: DownloadCallback | None = None,
+    ) -> SyncResult:
+        """
+        Like download_all, but only fetch what is new or changed since the last
+        sync into `dest`. Files that disappeared remotely are reported in
+        `removed`, and deleted if `delete` is set.
+        """
+        sync = Sync(self.session, dest, concurrency, callback)
+        self.__mirror(sync, dest, include)
+        return sync.finish(delete)
+
+    def get_all_statuses(  # pylint: disable=too-many-locals
+        self, concurrency: int = 8, text: bool = True,
+        columns: tuple[str, ...] = COLUMNS
+    ) -> StatusMatrix:
+        """
+        Get the status of every assignment in this course as a StatusMatrix,
+        in walk order. Listings and status pages are fetched by one pool of
+        `concurrency` workers. Assignments whose status could not be read get
+        an error instead of failing the whole call, and so does a group that
+        could not be listed, in place of the assignments below it.
+        """
+        errors = (OSError, ValueError, SessionExpired)
+        matrix = StatusMatrix(columns)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # (assignment, its status) or (group, why it could not be listed)
+            jobs: list[tuple[Group, Future | Exception]] = []
+            listings = deque([(self, pool.submit(self.get_items))])
+            while listings:
+                group, listing = listings.popleft()
+                try:
+                    items = listing.result()
+                except errors as e:
+                    # An assignment has a row of its own already
+                    if not group.submitable:
+                        jobs.append((group, e))
+                    continue
+                for item in items:
+                    listings.append((item, pool.submit(item.get_items)))
+                    if item.submitable:
+                        jobs.append((item, pool.submit(item.get_status, text)))
+
+            for group, job in jobs:
+                path = IdentityMap.canonical(group.path)
+                if isinstance(job, Exception):
+                    matrix.append(path, group.title, None, str(job))
+                    continue
+                try:
+                    matrix.append(path, group.title, job.result())
+                except errors as e:
+                    matrix.append(path, group.title, None, str(e))
+        return matrix
+
+    def __mirror(self, pool: DownloadPool | Sync, dest: str, include: tuple[str, ...]) -> None:
+        """
+        Schedule the listing of this course on `pool`. Each listing schedules
+        those of its items and the pages of its assignments, each of which
+        in turn schedules its files. A listing or page that fails is reported
+        in `failed` and only skips what is below it.
+        """
+        def collect(group: Group, directory: str) -> None:
+            entries = []
+            if "tcs" in include:
+                entries += group.get_test_cases()
+            if "files" in include:
+                entries += group.get_files()
+            if entries:
+                os.makedirs(directory, exist_ok=True)
+            for entry in entries:
+                pool.add(
+                    entry["title"],
+                    f"{self.base_url}{entry['path']}",
+                    os.path.join(directory, entry["title"]),
+                )
+
+        def expand(group: Group, directory: str) -> None:
+            for item in group.get_items():
+                name = IdentityMap.canonical(item.path).rstrip("/").split("/")[-1]
+                subdirectory = os.path.join(directory, name)
+                if item.submitable:
+                    pool.run(item.title, item.url, subdirectory, collect, item, subdirectory)
+                pool.run(item.title, item.api_url, subdirectory, expand, item, subdirectory)
+
+        pool.run(self.title, self.api_url, dest, expand, self, dest)
+
+    def _create_item(self, item_data):
+        """
+        Children of a course are created through create_group.
+        """
+        return self.create_group(item_data)
+
     def create_group(self, item_data):
         """
         Create a subgroup (Group or ExerciseGroup) based on item data.
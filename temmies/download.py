@@ -0,0 +1,218 @@
+"""
+Streaming, parallel file downloads.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Optional
+
+# Called with (title, destination, error) once a file is done; error is None on success.
+DownloadCallback = Callable[[str, str, Optional[Exception]], None]
+
+
+def _umask() -> int:
+    """
+    The process umask (it can only be read by setting it).
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of downloaded files, as if created with open(); read once, as
+# reading the umask briefly changes it for every thread
+FILE_MODE = 0o666 & ~_umask()
+
+
+class DownloadResult(list):
+    """
+    List of the downloaded file paths.
+    Files that could not be downloaded are listed in `failed` as
+    dicts with 'title', 'url', 'destination' and 'error'.
+    """
+
+    def __init__(self, downloaded=(), failed: list[dict] | None = None):
+        super().__init__(downloaded)
+        self.failed = failed if failed is not None else []
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether every file was downloaded.
+        """
+        return not self.failed
+
+    def __repr__(self):
+        return f"DownloadResult({list(self)}, failed={self.failed})"
+
+
+def download(
+    session, url: str, destination: str,
+    chunk_size: int = 64 * 1024, headers: dict[str, str] | None = None
+) -> dict[str, Any] | None:
+    """
+    Stream a file to disk.
+    The body is written to a temporary file next to `destination`,
+    which is only renamed into place once it is complete.
+
+    Returns the size, sha256, ETag and Last-Modified of the file,
+    or None if conditional `headers` were given and the server answered 304.
+    """
+    with session.get(url, stream=True, headers=headers) as response:
+        if response.status_code == 304 and headers:
+            return None
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to download '{url}' ({response.status_code}).")
+
+        directory = os.path.dirname(destination) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            # mkstemp creates the file readable by its owner only
+            os.chmod(tmp, FILE_MODE)
+            os.replace(tmp, destination)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+        return {
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+
+class DownloadPool:
+    """
+    Worker pool shared by all downloads of a job.
+    Other tasks (e.g. loading the page that lists the files) can be run
+    on the same pool and may schedule further downloads.
+    """
+
+    def __init__(self, session, workers: int = 4, callback: DownloadCallback | None = None):
+        self.session = session
+        self.callback = callback
+        self.__pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        # (future, (title, url, destination)); futures give (error, whether a file was written)
+        self.__tasks: list[tuple[Future, tuple[str, str, str]]] = []
+        self.__lock = threading.Lock()
+
+    def add(
+        self, title: str, url: str, destination: str,
+        headers: dict[str, str] | None = None,
+        done: Callable[[dict[str, Any] | None], None] | None = None,
+    ) -> None:
+        """
+        Schedule a file download.
+        `done` is called from the worker with the result of download()
+        once the file has been written (or found unchanged).
+        """
+        job = (title, url, destination)
+        future = self.__submit(self.__download, job, headers, done)
+        with self.__lock:
+            self.__tasks.append((future, job))
+
+    def run(self, title: str, url: str, destination: str, fn: Callable, *args) -> None:
+        """
+        Schedule another task; if it fails, it is reported like a failed download.
+        """
+        future = self.__submit(self.__run, fn, *args)
+        with self.__lock:
+            self.__tasks.append((future, (title, url, destination)))
+
+    def __submit(self, fn: Callable, *args) -> Future:
+        """
+        Run `fn` on the pool in a copy of the caller's context, so the
+        download is measured as part of the caller's operation.
+        """
+        return self.__pool.submit(copy_context().run, self.__task, fn, *args)
+
+    def __task(self, fn: Callable, *args) -> tuple[Exception | None, bool]:
+        try:
+            return fn(*args)
+        finally:
+            # The worker may be done with the pool, complete its last record
+            metrics = getattr(self.session, "metrics", None)
+            if metrics is not None:
+                metrics.settle()
+
+    def __run(self, fn: Callable, *args) -> tuple[Exception | None, bool]:
+        try:
+            fn(*args)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return e, False
+        return None, False
+
+    def __download(self, job: tuple[str, str, str], headers, done) -> tuple[Exception | None, bool]:
+        title, url, destination = job
+        try:
+            meta = download(self.session, url, destination, headers=headers)
+            if done:
+                done(meta)
+        # Anything (e.g. SessionExpired) fails only this file, not the whole job
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if self.callback:
+                self.callback(title, destination, e)
+            return e, False
+        if meta is None:
+            return None, False
+        if self.callback:
+            self.callback(title, destination, None)
+        return None, True
+
+    def wait(self) -> DownloadResult:
+        """
+        Wait for every task, including those scheduled while waiting,
+        and collect the results in the order they were scheduled.
+        """
+        result = DownloadResult()
+        done = 0
+        try:
+            while True:
+                with self.__lock:
+                    if done == len(self.__tasks):
+                        break
+                    future, job = self.__tasks[done]
+                done += 1
+                error, written = future.result()
+                title, url, destination = job
+                if error is not None:
+                    result.failed.append({
+                        "title": title,
+                        "url": url,
+                        "destination": destination,
+                        "error": error,
+                    })
+                elif written:
+                    result.append(destination)
+        finally:
+            # If interrupted, drop what has not started and let the running
+            # tasks finish, so nothing writes to `dest` after returning
+            self.__pool.shutdown(wait=True, cancel_futures=True)
+        return result
+
+
+def download_all(
+    session,
+    jobs: list[tuple[str, str, str]],
+    workers: int = 4,
+    callback: DownloadCallback | None = None,
+) -> DownloadResult:
+    """
+    Download (title, url, destination) jobs with a pool of `workers` threads.
+    """
+    pool = DownloadPool(session, workers, callback)
+    for job in jobs:
+        pool.add(*job)
+    return pool.wait()
@@ -3,10 +3,12 @@
 from .course_unavailable import CourseUnavailable
 from .illegal_action import IllegalAction
 from .session_expired import SessionExpired, SessionRefreshed
+from .two_factor_required import TwoFactorRequired
 
 __all__ = [
 	"CourseUnavailable",
 	"IllegalAction",
 	"SessionExpired",
 	"SessionRefreshed",
+	"TwoFactorRequired",
 ]
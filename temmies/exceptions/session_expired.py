@@ -11,5 +11,6 @@ class SessionExpired(Exception):
 class SessionRefreshed(Exception):
     """Raised when the session cookies have been refreshed.
 
-    This is mainly used internally to signal that the session should be retried.
+    Kept for compatibility: requests are now replayed automatically after
+    a refresh, so this is no longer raised.
     """
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Two Factor Required Exception
+"""
+
+class TwoFactorRequired(Exception):
+    """Raised when a browserless login reaches a step that needs interaction,
+    such as a second factor."""
+    def __init__(self, message: str = ""):
+        super().__init__(f"Two-factor authentication required: {message}")
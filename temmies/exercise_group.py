@@ -2,7 +2,6 @@
 Represents a submittable exercise.
 """
 
-from bs4 import BeautifulSoup
 from .group import Group
 
 class ExerciseGroup(Group):
@@ -19,13 +18,7 @@ class ExerciseGroup(Group):
         Find the name of the exercise group.
         """
         if self.title == "":
-            response = self.session.get(self.base_url + self.path)
-            soup = BeautifulSoup(response.text, "lxml")
-            title_elements = soup.find_all("a", class_="fill accent large")
-            if title_elements:
-                self.title = title_elements[-1].get_text(strip=True)
-            else:
-                self.title = self.path.split("/")[-1]
+            self.title = self._raw.title or self.path.split("/")[-1]
 
     def __str__(self):
         return f"ExerciseGroup({self.title})"
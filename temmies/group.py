@@ -4,12 +4,17 @@ Abstract-ish Group class for Themis API.
 
 
 import os
-from json import loads
-from time import sleep
-from typing import Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
 
-from bs4 import BeautifulSoup
-from .submission import Submission
+from .download import DownloadCallback, DownloadResult, download_all
+from .metrics import measured, parsing
+from .parsing import GroupPage, parse, parse_status
+from .results import SYMBOLS, Backoff, poll_results
+from .session import BASE_URL
+from .submission import Submission, package_files
+from .sync import Sync, SyncResult
 
 
 class Group:
@@ -25,129 +30,217 @@ class Group:
         self.title = title
         self.parent = parent
         self.submitable = submitable
-        self.base_url = "https://themis.housing.rug.nl"
-        self.api_url = f"{self.base_url}/api/navigation{self.path}"
+        self.base_url = getattr(session, "base_url", BASE_URL)
         self.classes = []
 
         # Adjust URL construction to include '/course' when accessing HTML pages
         if not self.path.startswith('/course/'):
-            group_url = f"{self.base_url}/course{self.path}"
+            self.url = f"{self.base_url}/course{self.path}"
+            self.api_url = f"{self.base_url}/api/navigation{self.path}"
         else:
-            group_url = f"{self.base_url}{self.path}"
+            self.url = f"{self.base_url}{self.path}"
+            self.api_url = f"{self.base_url}/api/navigation{self.path[len('/course'):]}"
 
-        # Fetch the page and parse it
-        response = self.session.get(group_url)
+        # The page is only fetched once something actually needs it
+        self._page: GroupPage | None = None
+
+    @property
+    def registry(self):
+        """
+        Identity map shared along the parent chain, if any.
+        """
+        return getattr(self.parent, "registry", None)
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Whether the page of this group has been fetched and parsed.
+        """
+        return self._page is not None
+
+    def load(self, force: bool = False) -> 'Group':
+        """
+        Fetch and parse the page of this group.
+        Called automatically by the methods that need it.
+        """
+        if self._page is not None and not force:
+            return self
+
+        response = self.session.get(self.url)
         if response.status_code != 200:
             raise ConnectionError(f"Failed to retrieve page for '{self.title}'.")
-        self._raw = BeautifulSoup(response.text, "lxml")
+        with parsing(response):
+            self._page = GroupPage.from_html(response.text)
+        return self
+
+    @property
+    def _raw(self) -> GroupPage:
+        """
+        Data extracted from the page of this group, loaded on first access.
+        """
+        self.load()
+        return self._page
 
+    @measured("get_items")
     def get_items(self) -> list['Group']:
         """
         Get all items (groups and assignments) under this group.
+        Uses the navigation API, falling back to scraping the page.
+        """
+        registry = self.registry
+        if registry is not None:
+            items = registry.get("items", self.path)
+            if items is not None:
+                return list(items)
+
+        items_data = self.__fetch_items_data()
+        if items_data is None:
+            items_data = self._raw.items
+
+        items = [
+            self.__child(item_data)
+            for item_data in items_data
+            if item_data.get("visible", False)
+        ]
+        if registry is not None:
+            registry.put("items", self.path, items)
+        return list(items)
+
+    def __child(self, item_data: dict[str, Any]) -> 'Group':
+        """
+        Get the child for navigation data, reusing the registered one if there is one.
+        """
+        registry = self.registry
+        if registry is None:
+            return self._create_item(item_data)
+        item = registry.get("group", item_data["path"])
+        if item is None:
+            item = registry.put("group", item_data["path"], self._create_item(item_data))
+        return item
+
+    def __fetch_items_data(self) -> list[dict[str, Any]] | None:
+        """
+        Get the children of this group from the navigation API.
+        Returns None if the API did not give a usable answer.
+        """
+        response = self.session.get(self.api_url)
+        if response.status_code != 200:
+            return None
+
+        try:
+            with parsing(response):
+                items_data = response.json()
+        except ValueError:
+            return None
+
+        if not isinstance(items_data, list):
+            return None
+        return items_data
+
+    def _create_item(self, item_data: dict[str, Any]) -> 'Group':
+        """
+        Create a child item from navigation data.
         """
-        section = self._raw.find("div", class_="ass-children")
-        if not section:
-            return []
-
-        entries = section.find_all("a", href=True)
-        items = []
-        for x in entries:
-            href = x['href']
-            name = x.text.strip()
-            classes = x.get('class', [])
-            submitable = "ass-submitable" in classes
-            item = Group(
-                session=self.session,
-                path=href,
-                title=name,
-                parent=self,
-                submitable=submitable
-            )
-            items.append(item)
-        return items
+        return Group(
+            session=self.session,
+            path=item_data["path"],
+            title=item_data["title"],
+            parent=self,
+            submitable=item_data.get("submitable", False)
+        )
+
+    def walk(self, max_depth: int | None = None, concurrency: int = 8) -> Iterator['Group']:
+        """
+        Yield every item below this group, breadth-first.
+        Listings are fetched by a pool of `concurrency` workers sharing the
+        session, and items are yielded as soon as their parent has been listed.
+        The order within each level is the same as get_items.
+        """
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            pending = deque([(pool.submit(self.get_items), 1)])
+            while pending:
+                future, depth = pending.popleft()
+                for item in future.result():
+                    if max_depth is None or depth < max_depth:
+                        pending.append((pool.submit(item.get_items), depth + 1))
+                    yield item
+        finally:
+            # Stop fetching if the caller stops iterating early
+            pool.shutdown(wait=False, cancel_futures=True)
 
     def get_item_by_title(self, title: str):
         """
-        Get a single item by its title, case-insensitive.
+        Get a single item by its title, case-insensitive, or by the last part of its path.
         """
-        items = self.get_items()
-        for item in items:
-            if (item.title.lower() == title.lower()) or (item.path.split("/")[-1] == title):
-                return item
-        raise ValueError(f"Item '{title}' not found under {self.title}.")
+        titles, names = self.__title_index()
+        item = titles.get(title.lower()) or names.get(title)
+        if item is None:
+            raise ValueError(f"Item '{title}' not found under {self.title}.")
+        return item
 
+    def __title_index(self) -> tuple[dict[str, 'Group'], dict[str, 'Group']]:
+        """
+        Map lowercased titles and path names of the items to the items.
+        """
+        registry = self.registry
+        if registry is not None:
+            index = registry.get("index", self.path)
+            if index is not None:
+                return index
+
+        titles: dict[str, Group] = {}
+        names: dict[str, Group] = {}
+        for item in self.get_items():
+            titles.setdefault(item.title.lower(), item)
+            names.setdefault(item.path.rstrip("/").split("/")[-1], item)
+
+        if registry is not None:
+            return registry.put("index", self.path, (titles, names))
+        return titles, names
+
+    @measured("get_status")
     def get_status(self, text: bool = False) -> dict[str, str | Submission] | None:
         """
         Get the status of the current group, if available.
+        Linked submissions are given as Submission handles, which are only
+        fetched when used; keys linking to the same submission share one.
         """
-        status_link = self._raw.find("a", text="Status")
-        if not status_link:
+        status_href = self._raw.status_href
+        if not status_href:
             raise ValueError(
                 "Status information is not available for this group.")
 
-        status_url = f"{self.base_url}{status_link['href']}"
+        status_url = f"{self.base_url}{status_href}"
         response = self.session.get(status_url)
         if response.status_code != 200:
             raise ConnectionError(
                 f"Failed to retrieve status page for '{self.title}'.")
 
-        soup = BeautifulSoup(response.text, "lxml")
-        section = soup.find("div", class_="cfg-container")
-
-        if not section:
+        with parsing(response):
+            lines = parse_status(parse(response.text))
+        if lines is None:
             return None
 
-        return self.__parse_status_section(section, text)
-
-    def __parse_status_section(
-        self, section: BeautifulSoup,
-        text: bool
-    ) -> dict[str, str | Submission]:
-        """
-        Parse the status section of the group and clean up keys.
-        """
-        key_mapping = {
-            "leading the submission that counts towards the grade": "leading",
-            "best the latest submission with the best result": "best",
-            "latest the most recent submission": "latest",
-            "first pass the first submission that passed": "first_pass",
-            "last pass the last submission to pass before the deadline": "last_pass",
-        }
-
         parsed = {}
-        cfg_lines = section.find_all("div", class_="cfg-line")
-        for line in cfg_lines:
-            key_element = line.find("span", class_="cfg-key")
-            value_element = line.find("span", class_="cfg-val")
-            if not key_element or not value_element:
+        submissions: dict[str, Submission] = {}
+        for key, (value, href) in lines.items():
+            if not href or text:
+                parsed[key] = value
                 continue
 
-            # Normalize key
-            raw_key = " ".join(key_element.get_text(
-                separator=" ").strip().replace(":", "").lower().split())
-            # Use mapped key if available
-            key = key_mapping.get(raw_key, raw_key)
-
-            # Process value
-            link = value_element.find("a", href=True)
-            if link and not text:
-                href = link["href"]
-                # Construct full URL
-                if href.startswith("/"):
-                    submission_url = href
-                elif href.startswith("http"):
-                    submission_url = href.replace(
-                        "https://themis.housing.rug.nl", "")
-                else:
-                    print(f"Invalid href '{href}' found in status page.")
-                    continue  # Skip this entry if href is invalid
-
-                # Instantiate Submission with submission_url and session
-                submission = Submission(submission_url, self.session)
-                parsed[key] = submission
+            # Construct full URL
+            if href.startswith("/"):
+                submission_url = href
+            elif href.startswith("http"):
+                submission_url = href.replace(self.base_url, "")
             else:
-                parsed[key] = value_element.get_text(separator=" ").strip()
+                print(f"Invalid href '{href}' found in status page.")
+                continue  # Skip this entry if href is invalid
 
+            if submission_url not in submissions:
+                submissions[submission_url] = Submission(submission_url, self.session)
+            parsed[key] = submissions[submission_url]
         return parsed
 
     def get_test_cases(self) -> list[dict[str, str]]:
@@ -158,101 +251,97 @@ class Group:
             raise ValueError(
                 f"No test cases for non-submittable item '{self.title}'.")
 
-        sections = self._raw.find_all("div", class_="subsec round shade")
-        tcs = []
-        for div in sections:
-            res = div.find("h4", class_="info")
-            if res and "Test cases" in res.text:
-                for case in div.find_all("div", class_="cfg-line"):
-                    link = case.find("a")
-                    if link:
-                        tcs.append({
-                            'title': link.text.strip(),
-                            'path': link['href']
-                        })
-        return tcs
-
-    def download_tcs(self, path=".") -> list[str]:
+        return self._raw.test_cases
+
+    @measured("download_tcs")
+    def download_tcs(
+        self, path=".", workers: int = 4, callback: DownloadCallback | None = None
+    ) -> DownloadResult:
         """
         Download all test cases for this assignment.
+        Returns the downloaded paths; failures are listed in `failed`.
         """
-        test_cases = self.get_test_cases()
-        downloaded = []
-        for tc in test_cases:
-            url = f"{self.base_url}{tc['path']}"
-            print(f"Downloading {tc['title']}")
-            response = self.session.get(url)
-            if response.status_code == 200:
-                tc_filename = os.path.join(path, tc['title'])
-                with open(tc_filename, 'wb') as f:
-                    f.write(response.content)
-                downloaded.append(tc_filename)
-            else:
-                print(f"Failed to download test case '{tc['title']}'")
-        return downloaded
+        return self.__download(self.get_test_cases(), path, workers, callback)
 
     def get_files(self) -> list[dict[str, str]]:
         """
         Get all downloadable files for this assignment.
         """
-        details = self._raw.find(
-            "div", id=lambda x: x and x.startswith("details"))
-        if not details:
-            return []
-
-        cfg_lines = details.find_all("div", class_="cfg-line")
-        files = []
-
-        for line in cfg_lines:
-            key = line.find("span", class_="cfg-key")
-            if key and "Downloads" in key.text.strip():
-                vals = line.find_all("span", class_="cfg-val")
-                for val in vals:
-                    links = val.find_all("a")
-                    for link in links:
-                        files.append({
-                            'title': link.text.strip(),
-                            'path': link['href']
-                        })
-        return files
-
-    def download_files(self, path=".") -> list[str]:
+        return self._raw.files
+
+    @measured("download_files")
+    def download_files(
+        self, path=".", workers: int = 4, callback: DownloadCallback | None = None
+    ) -> DownloadResult:
         """
         Download all files available for this assignment.
+        Returns the downloaded paths; failures are listed in `failed`.
         """
-        files = self.get_files()
-        downloaded = []
-        for file in files:
-            print(f"Downloading file '{file['title']}'")
-            url = f"{self.base_url}{file['path']}"
-            response = self.session.get(url)
-            if response.status_code == 200:
-                file_filename = os.path.join(path, file['title'])
-                with open(file_filename, 'wb') as f:
-                    f.write(response.content)
-                downloaded.append(file_filename)
-            else:
-                print(f"Failed to download file '{file['title']}'")
-        return downloaded
+        return self.__download(self.get_files(), path, workers, callback)
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def sync(
+        self,
+        dest: str = ".",
+        include: tuple[str, ...] = ("tcs", "files"),
+        concurrency: int = 4,
+        delete: bool = False,
+        callback: DownloadCallback | None = None,
+    ) -> SyncResult:
+        """
+        Bring the test cases and/or files in `dest` up to date, fetching only
+        what changed since the last sync (tracked in a manifest in `dest`).
+        Files that disappeared remotely are reported, and deleted if `delete` is set.
+        """
+        os.makedirs(dest, exist_ok=True)
+        sync = Sync(self.session, dest, concurrency, callback)
+        entries = []
+        if "tcs" in include:
+            entries += self.get_test_cases()
+        if "files" in include:
+            entries += self.get_files()
+        for entry in entries:
+            sync.add(entry['title'], f"{self.base_url}{entry['path']}",
+                     os.path.join(dest, entry['title']))
+        return sync.finish(delete)
+
+    def __download(
+        self, entries: list[dict[str, str]], path: str,
+        workers: int, callback: DownloadCallback | None
+    ) -> DownloadResult:
+        """
+        Stream the given test cases or files into `path` in parallel.
+        """
+        jobs = [
+            (entry['title'], f"{self.base_url}{entry['path']}", os.path.join(path, entry['title']))
+            for entry in entries
+        ]
+        return download_all(self.session, jobs, workers, callback)
 
     # pylint: disable=too-many-locals
+    @measured("submit")
     def submit(
         self,
         files: list[str],
         judge: bool = True,
-        wait: bool = True,
+        wait: bool | str = True,
         silent: bool = True,
-        sudo: str | None = None
-    ) -> dict[int, bool | None] | str | None:
+        sudo: str | None = None,
+        backoff: Backoff | None = None,
+        timeout: float | None = None,
+    ) -> dict[int, bool | None] | Iterator[tuple[int, bool | None]] | str | None:
         """
         Submit files to this assignment.
-        Returns a dictionary of test case results or None if wait is False.
+        Returns a dictionary of test case results, or the submission URL if wait is False.
+        With wait="stream", returns a generator of (case, result) that yields
+        each test case as soon as it has been judged.
+        Results are polled with `backoff`; TimeoutError is raised after `timeout` seconds.
         """
         if not self.submitable:
             raise ValueError(
                 f"Cannot submit to non-submittable item '{self.title}'.")
 
-        form = self._raw.find("form")
+        form = self._raw.form
         if not form:
             # try to check log in
             raise ValueError("Submission form not found.")
@@ -261,30 +350,10 @@ class Group:
         if sudo:
             url += f"?sudo={sudo}"
 
-        file_types: dict[str, Any] = loads(form.get("data-suffixes", "{}"))
-
         if isinstance(files, str):
             files = [files]
 
-        packaged_files = []
-        data = {}
-        found_type = ""
-
-        for file in files:
-            for suffix, lang in file_types.items():
-                if file.endswith(suffix):
-                    found_type = lang
-                    break
-            if not found_type:
-                print("WARNING: File type not recognized")
-
-            with open(file, "rb") as f:
-                packaged_files.append((found_type, (file, f.read())))
-
-        data = {
-            "judgenow": "true" if judge else "false",
-            "judgeLanguage": found_type if found_type else "none"
-        }
+        packaged_files, data = package_files(files, form["suffixes"], judge)
 
         if not silent:
             print(f"Submitting to {self.title}")
@@ -296,71 +365,32 @@ class Group:
         if not wait or not judge:
             return resp.url if "@submissions" in resp.url else None
 
-        return self.__wait_for_result(resp.url, not silent, [])
+        if wait == "stream":
+            return self.iter_results(resp.url, backoff, timeout)
+        return self.__wait_for_result(resp.url, not silent, backoff, timeout)
 
-    def __wait_for_result(self, url: str, verbose: bool, _printed: list[int]) -> dict[int, bool | None]:
+    def iter_results(
+        self, url: str, backoff: Backoff | None = None, timeout: float | None = None
+    ) -> Iterator[tuple[int, bool | None]]:
         """
-        Wait for the submission result and return the test case results.
+        Yield (case, result) for each test case of a submission as soon as
+        it has been judged, polling the result page with `backoff`.
         """
-        r = self.session.get(url)
-        soup = BeautifulSoup(r.text, "lxml")
-        return self.__parse_table(soup, url, verbose, _printed)
+        return poll_results(self.session, url, backoff, timeout)
 
-    def __parse_table(
-        self, soup: BeautifulSoup, url: str, verbose: bool, _printed: list[int]
+    def __wait_for_result(
+        self, url: str, verbose: bool,
+        backoff: Backoff | None, timeout: float | None
     ) -> dict[int, bool | None]:
         """
-        Parse the results table from the submission result page.
-        Wait until all queued status-icons disappear before parsing.
-        """
-        cases = soup.find_all("tr", class_="sub-casetop")
-        fail_pass: dict[int, bool | None] = {}
-        any_queued = False
-
-        for case in cases:
-            name = case.find("td", class_="sub-casename").text.strip()
-            status = case.find("td", class_="status-icon")
-
-            case_number = int(name)
-
-            status_classes = status.get("class", [])
-            if "queued" in status_classes:
-                any_queued = True
-                break
-
-            if "pending" in status_classes:
-                sleep(1)
-                return self.__wait_for_result(url, verbose, _printed)
-
-            statuses = {
-                "Passed": ("✅", True),
-                "Wrong output": ("❌", False),
-                "No status": ("🐛", None),
-                "error": ("🐛", None),
-            }
-
-            found = False
-            for key, (symbol, value) in statuses.items():
-                if key.lower() in status.text.lower():
-                    found = True
-                    if verbose and case_number not in _printed:
-                        print(f"Case {case_number}: {symbol}")
-                    fail_pass[case_number] = value
-                    break
-
-            if not found:
-                fail_pass[case_number] = None
-                if verbose and case_number not in _printed:
-                    print(f"{case_number}: Unrecognized status: {status.text.strip()}")
-
-            _printed.append(case_number)
-
-        # Polling (fix, use ws)
-        if any_queued:
-            sleep(1)
-            return self.__wait_for_result(url, verbose, _printed)
-
-        return fail_pass
+        Wait for the submission result and return the test case results.
+        """
+        results: dict[int, bool | None] = {}
+        for case, result in self.iter_results(url, backoff, timeout):
+            results[case] = result
+            if verbose:
+                print(f"Case {case}: {SYMBOLS[result]}")
+        return results
 
     def __str__(self):
         return f"Group({self.title}, submitable={self.submitable})"
@@ -0,0 +1,409 @@
+"""
+Metrics of the requests made by a Themis instance, and of the time its
+public methods spend waiting for the network and parsing pages.
+"""
+
+import threading
+import warnings
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from types import GeneratorType
+from typing import Any, Callable, Iterator
+from urllib.parse import urlsplit
+
+# Public method whose requests are being made (see `measured`)
+_OPERATION: ContextVar[str | None] = ContextVar("temmies_operation", default=None)
+
+
+def url_template(url: str, base_url: str | None = None) -> str:
+    """
+    URL without the parts that vary per course, assignment or submission,
+    e.g. '/course/{path}' or '/api/navigation/{path}'. URLs on other hosts
+    than `base_url` (e.g. the sign-on) keep their host.
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    keep = 2 if segments[:1] == ["api"] else 1
+    template = "/" + "/".join(segments[:keep])
+    if len(segments) > keep:
+        template += "/{path}"
+    if base_url is None or parts.netloc != urlsplit(base_url).netloc:
+        template = parts.netloc + template
+    return template
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """
+    The `fraction` percentile (nearest rank) of sorted `values`.
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class RequestRecord:  # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    """
+    What happened to one request:
+    - method, template: HTTP method and URL template (see `url_template`)
+    - status: HTTP status, or None if no response was received
+    - latency: seconds until the response (headers, for streamed downloads)
+    - bytes: size of the body (Content-Length for streamed downloads)
+    - parse_time: seconds spent extracting data from the response
+    - retries: times the request was sent again (e.g. after logging in again)
+    - cache: 'hit', 'revalidated' or 'miss' for cacheable requests, else None
+    - operation: public method that made the request, if any
+    - error: name of the exception raised, if any
+    """
+
+    __slots__ = (
+        "method", "template", "status", "latency", "bytes", "parse_time",
+        "retries", "cache", "operation", "error", "nested", "streamed",
+    )
+
+    def __init__(self, method: str, template: str, operation: str | None, nested: bool):
+        self.method = method
+        self.template = template
+        self.status: int | None = None
+        self.latency = 0.0
+        self.bytes = 0
+        self.parse_time = 0.0
+        self.retries = 0
+        self.cache: str | None = None
+        self.operation = operation
+        self.error: str | None = None
+        # Made while another request was in progress (i.e. logging in again)
+        self.nested = nested
+        # Body streamed to the caller, so it is never parsed
+        self.streamed = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        The record as a dictionary, e.g. to export it.
+        """
+        return {
+            name: getattr(self, name) for name in self.__slots__
+            if name not in ("nested", "streamed")
+        }
+
+    def __repr__(self):
+        return (
+            f"RequestRecord({self.method} {self.template} -> {self.status}, "
+            f"{self.latency * 1000:.1f} ms)"
+        )
+
+
+class Metrics:
+    """
+    Collects a RequestRecord for every request of a session.
+
+    A record is complete once its response has been parsed. Streamed
+    responses (downloads) are complete right away, and other responses
+    that are not parsed once the next request of the same thread finishes
+    or the operation (or pool task) that made them ends. Complete records
+    are kept (the last `history`) for `stats`
+    and passed to the callbacks, which are called from the requesting
+    thread and must be quick.
+    """
+
+    def __init__(self, history: int = 10000):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__records: deque[RequestRecord] = deque(maxlen=history)
+        # Thread id -> its last record, until it is parsed or superseded
+        self.__pending: dict[int, RequestRecord] = {}
+        self.__callbacks: list[Callable[[RequestRecord], None]] = []
+        self.__operations: dict[str, dict[str, float]] = {}
+
+    def add_callback(self, callback: Callable[[RequestRecord], None]) -> None:
+        """
+        Call `callback` with every complete record.
+        """
+        with self.__lock:
+            self.__callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[RequestRecord], None]) -> None:
+        """
+        Stop calling `callback`.
+        """
+        with self.__lock:
+            self.__callbacks.remove(callback)
+
+    @contextmanager
+    def request(
+        self, method: str, url: str, base_url: str | None = None
+    ) -> Iterator[RequestRecord]:
+        """
+        Time a request; the caller fills in the response with `observe`.
+        """
+        frames = self.__frames()
+        record = RequestRecord(
+            method.upper(), url_template(url, base_url), _OPERATION.get(), bool(frames)
+        )
+        frames.append(record)
+        start = perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = perf_counter() - start
+            frames.pop()
+            self.__finish(record)
+
+    def observe(self, record: RequestRecord, response, stream: bool = False) -> None:
+        """
+        Fill in `record` from `response`, and attach it so parsing can be timed.
+        """
+        record.status = response.status_code
+        record.streamed = stream
+        if stream:
+            record.bytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            record.bytes = len(response.content or b"")
+        response.metrics_record = (record, self)
+
+    def retried(self) -> None:
+        """
+        Count a retry of the request in progress on this thread.
+        """
+        frames = self.__frames()
+        if frames:
+            frames[-1].retries += 1
+
+    @contextmanager
+    def parsing(self, response) -> Iterator[None]:
+        """
+        Time the extraction of data from `response`.
+        """
+        record = getattr(response, "metrics_record", (None,))[0]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            if record is not None:
+                self.__parsed(record, perf_counter() - start)
+
+    @contextmanager
+    def operation(self, name: str, call: bool = True) -> Iterator[None]:
+        """
+        Attribute the requests made (also by worker pools that copy the
+        context) to the public method `name`. Nested operations count
+        towards the outermost one. With `call` False, the time is added
+        to the operation without counting another call (e.g. to iterate
+        over the generator it returned).
+        """
+        if _OPERATION.get() is not None:
+            try:
+                yield
+            finally:
+                self.settle()
+            return
+
+        token = _OPERATION.set(name)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            _OPERATION.reset(token)
+            self.settle()
+            with self.__lock:
+                totals = self.__totals(name)
+                totals["calls"] += call
+                totals["wall"] += perf_counter() - start
+
+    def settle(self) -> None:
+        """
+        Complete the record of this thread still waiting to be parsed,
+        once the thread is done with the response (e.g. an operation ended).
+        """
+        with self.__lock:
+            record = self.__pending.pop(threading.get_ident(), None)
+        if record is not None:
+            self.__emit(record)
+
+    def flush(self) -> None:
+        """
+        Complete the records still waiting to be parsed.
+        """
+        with self.__lock:
+            pending = list(self.__pending.values())
+            self.__pending.clear()
+        for record in pending:
+            self.__emit(record)
+
+    def reset(self) -> None:
+        """
+        Forget everything collected so far.
+        """
+        with self.__lock:
+            self.__records.clear()
+            self.__pending.clear()
+            self.__operations.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Aggregates of the complete records (see Themis.stats).
+        """
+        self.flush()
+        with self.__lock:
+            records = list(self.__records)
+            operations = {name: dict(totals) for name, totals in self.__operations.items()}
+
+        templates: dict[str, list[RequestRecord]] = {}
+        statuses: dict[str, int] = {}
+        cache = {"hit": 0, "revalidated": 0, "miss": 0}
+        for record in records:
+            templates.setdefault(f"{record.method} {record.template}", []).append(record)
+            status = str(record.status) if record.status is not None else record.error
+            statuses[status] = statuses.get(status, 0) + 1
+            if record.cache is not None:
+                cache[record.cache] += 1
+
+        return {
+            **self.__summary(records),
+            "cache": cache,
+            "statuses": statuses,
+            "templates": {name: self.__summary(group) for name, group in sorted(templates.items())},
+            "operations": operations,
+        }
+
+    @staticmethod
+    def __summary(records: list[RequestRecord]) -> dict[str, Any]:
+        """
+        Counts, sizes and latency/parse time percentiles of `records`.
+        Answers from the cache are left out of the latencies.
+        """
+        latencies = sorted(r.latency for r in records if r.cache != "hit")
+        parse_times = sorted(r.parse_time for r in records if r.parse_time)
+        return {
+            "requests": len(records),
+            "errors": sum(
+                1 for r in records if r.error is not None or (r.status or 0) >= 400
+            ),
+            "retries": sum(r.retries for r in records),
+            "bytes": sum(r.bytes for r in records),
+            "latency": {
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+                "total": sum(latencies),
+            },
+            "parse": {
+                "p50": percentile(parse_times, 0.5),
+                "p95": percentile(parse_times, 0.95),
+                "total": sum(parse_times),
+            },
+        }
+
+    def __frames(self) -> list[RequestRecord]:
+        """
+        Requests in progress on this thread, innermost last.
+        """
+        if not hasattr(self.__local, "frames"):
+            self.__local.frames = []
+        return self.__local.frames
+
+    def __totals(self, operation: str) -> dict[str, float]:
+        """
+        Totals of an operation; call with the lock held.
+        """
+        return self.__operations.setdefault(
+            operation, {"calls": 0, "wall": 0.0, "network": 0.0, "parse": 0.0}
+        )
+
+    def __finish(self, record: RequestRecord) -> None:
+        """
+        A request is done: it waits for parsing, and the previous one of
+        this thread is complete.
+        """
+        thread = threading.get_ident()
+        with self.__lock:
+            # Nested requests are part of the latency of the outer one
+            if record.operation is not None and not record.nested:
+                self.__totals(record.operation)["network"] += record.latency
+            previous = self.__pending.pop(thread, None)
+            waiting = record.error is None and not record.streamed
+            if waiting:
+                self.__pending[thread] = record
+        if previous is not None:
+            self.__emit(previous)
+        if not waiting:
+            self.__emit(record)
+
+    def __parsed(self, record: RequestRecord, seconds: float) -> None:
+        """
+        The response of `record` has been parsed.
+        """
+        thread = threading.get_ident()
+        with self.__lock:
+            record.parse_time += seconds
+            if record.operation is not None:
+                self.__totals(record.operation)["parse"] += seconds
+            waiting = self.__pending.get(thread) is record
+            if waiting:
+                del self.__pending[thread]
+        if waiting:
+            self.__emit(record)
+
+    def __emit(self, record: RequestRecord) -> None:
+        """
+        Keep a complete record and pass it to the callbacks.
+        """
+        with self.__lock:
+            self.__records.append(record)
+            callbacks = list(self.__callbacks)
+        for callback in callbacks:
+            try:
+                callback(record)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                warnings.warn(f"Metrics callback {callback!r} failed: {e!r}", RuntimeWarning)
+
+
+def parsing(response):
+    """
+    Context manager timing the parsing of `response`, if it was measured.
+    """
+    record = getattr(response, "metrics_record", None)
+    return record[1].parsing(response) if record is not None else nullcontext()
+
+
+def measured(name: str) -> Callable:
+    """
+    Decorator attributing the requests and parsing of a method of an object
+    with a `session` to the operation `name` in the session's metrics.
+    If the method returns a generator (e.g. submit with wait="stream"),
+    iterating over it is attributed to the operation as well.
+    """
+    def decorate(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self.session, "metrics", None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with metrics.operation(name):
+                result = method(self, *args, **kwargs)
+            if isinstance(result, GeneratorType):
+                return _measured_steps(metrics, name, result)
+            return result
+        return wrapper
+    return decorate
+
+
+def _measured_steps(metrics: Metrics, name: str, generator: Iterator) -> Iterator:
+    """
+    Iterate over `generator`, attributing each step to the operation `name`.
+    The operation is only entered while the generator runs, not while the
+    caller handles what it yielded.
+    """
+    while True:
+        with metrics.operation(name, call=False):
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+        yield item
@@ -0,0 +1,296 @@
+"""
+Extraction of data from Themis pages.
+Shared by the synchronous and asynchronous clients.
+
+Pages are parsed with lxml and only the regions temmies uses are read,
+with XPath. The extracted data is kept instead of the document tree.
+"""
+
+from json import loads
+from typing import Any
+
+import lxml.html
+from lxml import etree
+
+STATUS_KEYS = {
+    "leading the submission that counts towards the grade": "leading",
+    "best the latest submission with the best result": "best",
+    "latest the most recent submission": "latest",
+    "first pass the first submission that passed": "first_pass",
+    "last pass the last submission to pass before the deadline": "last_pass",
+}
+
+
+def _has_class(*names: str) -> str:
+    """
+    XPath predicate matching elements that have all the given classes.
+    """
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names
+    )
+
+
+def _first(element, path: str):
+    """
+    First match of an XPath, or None.
+    """
+    found = element.xpath(path)
+    return found[0] if found else None
+
+
+def _text(element, separator: str = "") -> str:
+    """
+    Text content of an element (without comments).
+    """
+    return separator.join(element.xpath(".//text()"))
+
+
+def parse(html: str | bytes):
+    """
+    Parse a page into an lxml tree.
+    """
+    try:
+        return lxml.html.document_fromstring(html)
+    except etree.ParserError:  # pylint: disable=c-extension-no-member
+        # Empty document
+        return lxml.html.document_fromstring("<html></html>")
+
+
+def parse_breadcrumbs(root) -> list[tuple[str, str]]:
+    """
+    Get the (href, title) breadcrumbs of a page, the page itself last.
+    """
+    return [
+        (a.get("href", ""), _text(a).strip())
+        for a in root.xpath(f"//a[{_has_class('fill', 'accent', 'large')}]")
+    ]
+
+
+def parse_title(root) -> str | None:
+    """
+    Get the title of a page from its breadcrumbs.
+    """
+    breadcrumbs = parse_breadcrumbs(root)
+    return breadcrumbs[-1][1] if breadcrumbs else None
+
+
+def parse_items(root) -> list[dict[str, Any]]:
+    """
+    Get the children listed on a group page, in the same shape as the navigation API.
+    """
+    section = _first(root, f"//div[{_has_class('ass-children')}]")
+    if section is None:
+        return []
+
+    return [
+        {
+            "visible": True,
+            "submitable": "ass-submitable" in (a.get("class") or "").split(),
+            "title": _text(a).strip(),
+            "path": a.get("href"),
+        }
+        for a in section.xpath(".//a[@href]")
+    ]
+
+
+def parse_test_cases(root) -> list[dict[str, str]]:
+    """
+    Get the test cases listed on an assignment page.
+    """
+    tcs = []
+    for div in root.xpath(f"//div[{_has_class('subsec', 'round', 'shade')}]"):
+        heading = _first(div, f".//h4[{_has_class('info')}]")
+        if heading is None or "Test cases" not in _text(heading):
+            continue
+        for line in div.xpath(f".//div[{_has_class('cfg-line')}]"):
+            link = _first(line, ".//a")
+            if link is not None:
+                tcs.append({
+                    'title': _text(link).strip(),
+                    'path': link.get("href"),
+                })
+    return tcs
+
+
+def parse_files(root) -> list[dict[str, str]]:
+    """
+    Get the downloads listed on an assignment page.
+    """
+    details = _first(root, "//div[starts-with(@id, 'details')]")
+    if details is None:
+        return []
+
+    files = []
+    for line in details.xpath(f".//div[{_has_class('cfg-line')}]"):
+        key = _first(line, f".//span[{_has_class('cfg-key')}]")
+        if key is None or "Downloads" not in _text(key):
+            continue
+        for link in line.xpath(f".//span[{_has_class('cfg-val')}]//a"):
+            files.append({
+                'title': _text(link).strip(),
+                'path': link.get("href"),
+            })
+    return files
+
+
+def parse_form(root) -> dict[str, Any] | None:
+    """
+    Get the action and accepted suffixes ({suffix: language}) of the submission form.
+    """
+    form = _first(root, "//form")
+    if form is None:
+        return None
+    return {
+        "action": form.get("action"),
+        "suffixes": loads(form.get("data-suffixes", "{}")),
+    }
+
+
+def parse_status_link(root) -> str | None:
+    """
+    Get the href of the status page of a group.
+    """
+    link = _first(root, "//a[. = 'Status']")
+    return link.get("href") if link is not None else None
+
+
+class GroupPage:  # pylint: disable=too-few-public-methods
+    """
+    Everything temmies uses from the page of a group:
+    - title: title of the page
+    - breadcrumbs: (href, title) of the page and its ancestors
+    - items: children, in the shape of the navigation API
+    - test_cases, files: [{'title', 'path'}] of an assignment
+    - form: {'action', 'suffixes'} of the submission form, or None
+    - status_href: link to the status page, or None
+    """
+
+    __slots__ = ("title", "breadcrumbs", "items", "test_cases", "files", "form", "status_href")
+
+    def __init__(self, root):
+        self.breadcrumbs = parse_breadcrumbs(root)
+        self.title = self.breadcrumbs[-1][1] if self.breadcrumbs else None
+        self.items = parse_items(root)
+        self.test_cases = parse_test_cases(root)
+        self.files = parse_files(root)
+        self.form = parse_form(root)
+        self.status_href = parse_status_link(root)
+
+    @classmethod
+    def from_html(cls, html: str | bytes) -> "GroupPage":
+        """
+        Extract a group page; the parsed tree is not kept.
+        """
+        return cls(parse(html))
+
+
+def parse_status(root) -> dict[str, tuple[str, str | None]] | None:
+    """
+    Get the lines of a status page as {key: (text, href of the linked submission)}.
+    Returns None if the page has no status section.
+    """
+    section = _first(root, f"//div[{_has_class('cfg-container')}]")
+    if section is None:
+        return None
+
+    parsed = {}
+    for line in section.xpath(f".//div[{_has_class('cfg-line')}]"):
+        key_element = _first(line, f".//span[{_has_class('cfg-key')}]")
+        value_element = _first(line, f".//span[{_has_class('cfg-val')}]")
+        if key_element is None or value_element is None:
+            continue
+
+        # Normalize key, using the short name if there is one
+        raw_key = " ".join(_text(key_element, " ").strip().replace(":", "").lower().split())
+        key = STATUS_KEYS.get(raw_key, raw_key)
+
+        link = _first(value_element, ".//a[@href]")
+        parsed[key] = (
+            _text(value_element, " ").strip(),
+            link.get("href") if link is not None else None,
+        )
+    return parsed
+
+
+def parse_cases(root) -> list[tuple[str, list[str], str]]:
+    """
+    Get the (name, status classes, status text) of each test case
+    in the results table of a submission page.
+    """
+    cases = []
+    for row in root.xpath(f"//tr[{_has_class('sub-casetop')}]"):
+        name = _first(row, f".//td[{_has_class('sub-casename')}]")
+        status = _first(row, f".//td[{_has_class('status-icon')}]")
+        if name is None or status is None:
+            continue
+        cases.append((_text(name).strip(), (status.get("class") or "").split(), _text(status)))
+    return cases
+
+
+def clean(text: str, value: bool = False) -> str:
+    """
+    Clean a key (or, with value=True, a value) of a submission page.
+    """
+    text = text.replace("\t", "").replace("\n", "")
+    if value:
+        return text.strip()
+    return text.replace(" ", "_").replace(":", "").lower().strip()
+
+
+def parse_submission_cases(root) -> dict[str, str]:
+    """
+    Get the status of each test case on a submission page.
+    """
+    table = _first(
+        root,
+        f"//div[{_has_class('sub-cases')}]//div[{_has_class('cfg-container')}]//table"
+    )
+    if table is None:
+        return {}
+    return {name: clean(status) for name, _, status in parse_cases(table)}
+
+
+def parse_submission_info(root) -> dict[str, Any] | None:
+    """
+    Get the details of a submission page.
+    The uploaded files are given as a list of (name, url).
+    """
+    for div in root.xpath(f"//div[{_has_class('subsec', 'round', 'shade')}]"):
+        heading = _first(div, f".//h4[{_has_class('info')}]")
+        if heading is None or "Details" not in _text(heading):
+            continue
+
+        info = {}
+        # Only the first container of the section (the files are listed there)
+        container = _first(div, f".//div[{_has_class('cfg-container')}]")
+        lines = [] if container is None else container.xpath(f".//div[{_has_class('cfg-line')}]")
+        for line in lines:
+            key = _text(_first(line, f".//span[{_has_class('cfg-key')}]"))
+            value = _first(line, f".//span[{_has_class('cfg-val')}]")
+            if "Files" not in key:
+                info[clean(key)] = clean(_text(value), value=True)
+            else:
+                info[clean(key)] = [(clean(_text(a)), a.get("href")) for a in value.xpath(".//a")]
+        return info
+    return None
+
+
+class SubmissionPage:  # pylint: disable=too-few-public-methods
+    """
+    Everything temmies uses from a submission page:
+    - cases: {case name: status}
+    - info: details of the submission, or None
+    """
+
+    __slots__ = ("cases", "info")
+
+    def __init__(self, root):
+        self.cases = parse_submission_cases(root)
+        self.info = parse_submission_info(root)
+
+    @classmethod
+    def from_html(cls, html: str | bytes) -> "SubmissionPage":
+        """
+        Extract a submission page; the parsed tree is not kept.
+        """
+        return cls(parse(html))
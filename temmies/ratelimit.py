@@ -0,0 +1,103 @@
+"""
+Client-side rate limiting.
+"""
+
+import threading
+from time import monotonic, sleep
+
+
+class RateLimiter:  # pylint: disable=too-few-public-methods
+    """
+    Token bucket allowing `rate` operations per second on average,
+    with bursts of up to `burst` (no limit if `rate` is None).
+    `hold` pauses everyone, e.g. when the server asks to retry later.
+    Safe to share between threads.
+    """
+
+    def __init__(self, rate: float | None, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.__tokens = float(burst)
+        self.__updated = monotonic()
+        self.__not_before = 0.0
+        self.__lock = threading.Lock()
+
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def hold(self, seconds: float) -> None:
+        """
+        Let no one acquire a token for the next `seconds`.
+        """
+        with self.__lock:
+            self.__not_before = max(self.__not_before, monotonic() + seconds)
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting until one is available.
+        Returns the time spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self.__lock:
+                now = monotonic()
+                if now < self.__not_before:
+                    delay = self.__not_before - now
+                elif self.rate is None:
+                    return waited
+                else:
+                    self.__refill(now)
+                    if self.__tokens >= 1:
+                        self.__tokens -= 1
+                        return waited
+                    delay = (1 - self.__tokens) / self.rate
+            sleep(delay)
+            waited += delay
+
+
+class AdaptiveConcurrency:  # pylint: disable=too-many-instance-attributes
+    """
+    Limit on the number of requests in flight that follows the server:
+    halved (down to `minimum`) when a request shows stress, at most once
+    per `cooldown` seconds, and raised by one after `limit` requests in a
+    row went fine (up to `maximum`). Safe to share between threads.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, cooldown: float = 1.0):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.cooldown = cooldown
+        self.limit = self.maximum
+        self.__in_flight = 0
+        self.__successes = 0
+        self.__shrunk = float("-inf")
+        self.__condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Wait until another request may be sent.
+        """
+        with self.__condition:
+            while self.__in_flight >= self.limit:
+                self.__condition.wait()
+            self.__in_flight += 1
+
+    def release(self, stressed: bool = False) -> None:
+        """
+        A request is done; `stressed` tells whether the server was overloaded.
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if stressed:
+                self.__successes = 0
+                now = monotonic()
+                if now - self.__shrunk >= self.cooldown and self.limit > self.minimum:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self.__shrunk = now
+            else:
+                self.__successes += 1
+                if self.__successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self.__successes = 0
+            self.__condition.notify_all()
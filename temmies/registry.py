@@ -0,0 +1,101 @@
+"""
+Identity map for the objects created by a Themis instance.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlsplit
+
+
+class IdentityMap:
+    """
+    Bounded map from canonical Themis paths to already created objects,
+    so the same page is not fetched and parsed twice in one run.
+
+    Entries are stored per kind ("group", "items", "index", "courses") and the least
+    recently used ones are dropped once `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict[tuple[str, str], Any] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def canonical(path: str) -> str:
+        """
+        Normalize a path or URL, e.g. '/course/2023-2024/adinc-ai/' -> '/2023-2024/adinc-ai'.
+        """
+        if "://" in path:
+            path = urlsplit(path).path
+        if path.startswith("/course/"):
+            path = path[len("/course"):]
+        return "/" + path.strip("/")
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, kind: str, path: str) -> Any | None:
+        """
+        Get the object stored for a path, counting the hit or miss.
+        """
+        key = (kind, self.canonical(path))
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return value
+
+    def put(self, kind: str, path: str, value: Any) -> Any:
+        """
+        Store an object for a path. If another thread stored one first,
+        that one is kept and returned instead.
+        """
+        key = (kind, self.canonical(path))
+        with self.__lock:
+            existing = self.__entries.get(key)
+            if existing is not None:
+                self.__entries.move_to_end(key)
+                return existing
+            self.__entries[key] = value
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+            return value
+
+    def invalidate(self, path: str) -> None:
+        """
+        Forget a path, everything below it, and the listing of its parent,
+        so the next lookup fetches it again.
+        """
+        path = self.canonical(path)
+        parent = path.rsplit("/", 1)[0] or "/"
+        with self.__lock:
+            for key in list(self.__entries):
+                kind, entry_path = key
+                if (
+                    entry_path == path
+                    or entry_path.startswith(path.rstrip("/") + "/")
+                    or (entry_path == parent and kind in ("items", "index", "courses"))
+                ):
+                    del self.__entries[key]
+
+    def clear(self) -> None:
+        """
+        Forget everything and reset the counters.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Hit/miss counters and current size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.__entries)}
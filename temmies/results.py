@@ -0,0 +1,118 @@
+"""
+Waiting for and parsing the results of a submission.
+"""
+
+import random
+from itertools import chain
+from time import monotonic, sleep
+from typing import Iterator
+
+from .metrics import parsing
+from .parsing import parse, parse_cases
+
+# Status text -> result of a test case
+STATUSES = {
+    "Passed": True,
+    "Wrong output": False,
+    "No status": None,
+    "error": None,
+}
+
+SYMBOLS = {True: "✅", False: "❌", None: "🐛"}
+
+
+class Backoff:  # pylint: disable=too-few-public-methods
+    """
+    Poll intervals, starting at `initial` seconds and growing by `factor`
+    up to `maximum`. Each interval is randomly varied by up to `jitter`
+    (a fraction), so many pollers do not hit Themis in lockstep.
+    """
+
+    def __init__(
+        self, initial: float = 1.0, maximum: float = 10.0,
+        factor: float = 1.5, jitter: float = 0.1
+    ):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+
+    def __iter__(self) -> Iterator[float]:
+        interval = self.initial
+        while True:
+            yield interval * (1 + random.uniform(-self.jitter, self.jitter))
+            interval = min(interval * self.factor, self.maximum)
+
+
+def parse_results(html: str | bytes) -> tuple[dict[int, bool | None], bool]:
+    """
+    Parse the results table of a submission page.
+    Returns the results of the test cases that have been judged, and
+    whether judging is done (no case is queued or pending anymore).
+    """
+    results: dict[int, bool | None] = {}
+    done = True
+
+    for name, status_classes, text in parse_cases(parse(html)):
+        if "queued" in status_classes or "pending" in status_classes:
+            done = False
+            continue
+
+        text = text.lower()
+        results[int(name)] = next(
+            (value for key, value in STATUSES.items() if key.lower() in text), None
+        )
+
+    return results, done
+
+
+def poll_delays(
+    url: str, backoff: Backoff | None = None, timeout: float | None = None
+) -> Iterator[float]:
+    """
+    Delays to wait before each poll of a submission page: none before the
+    first one, then following `backoff`. Raises TimeoutError once `timeout`
+    seconds have passed.
+    """
+    deadline = monotonic() + timeout if timeout is not None else None
+    for delay in chain([0.0], backoff or Backoff()):
+        if deadline is not None:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Submission '{url}' was not judged within {timeout}s.")
+            delay = min(delay, remaining)
+        yield delay
+
+
+def new_results(
+    results: dict[int, bool | None], seen: set[int]
+) -> list[tuple[int, bool | None]]:
+    """
+    The results of the cases not seen before; marks them as seen.
+    """
+    new = [(case, result) for case, result in results.items() if case not in seen]
+    seen.update(case for case, _ in new)
+    return new
+
+
+def poll_results(
+    session, url: str, backoff: Backoff | None = None, timeout: float | None = None
+) -> Iterator[tuple[int, bool | None]]:
+    """
+    Poll a submission page until judging is done, yielding (case, result)
+    for each test case as soon as it has been judged.
+    Raises TimeoutError if judging takes longer than `timeout` seconds.
+    """
+    seen: set[int] = set()
+    for delay in poll_delays(url, backoff, timeout):
+        sleep(delay)
+
+        response = session.get(url)
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve submission result '{url}'.")
+
+        with parsing(response):
+            results, done = parse_results(response.text)
+        yield from new_results(results, seen)
+        if done:
+            return
@@ -0,0 +1,94 @@
+"""
+Browserless login: the SAML flow of Themis done with plain HTTP requests.
+"""
+
+import re
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+
+from .exceptions import SessionExpired, TwoFactorRequired
+
+USER_FIELD = "Ecom_User_ID"
+PASSWORD_FIELD = "Ecom_Password"
+
+# Redirects done by scripts on the sign-on pages
+SCRIPT_REDIRECT = re.compile(r"""location(?:\.href)?\s*=\s*['"]([^'"]+)['"]""")
+
+MAX_STEPS = 10
+
+
+def saml_login(session, base_url: str, user: str, password: str, timeout: float = 30):
+    """
+    Log `session` in to Themis at `base_url`: follow the redirects to the
+    identity provider, post the credentials and relay the SAML response back.
+
+    Raises TwoFactorRequired when the identity provider asks for anything
+    else than the username and password, and SessionExpired if the login
+    is rejected.
+    """
+    home = urlsplit(base_url).netloc
+    response = session.get(f"{base_url}/login", timeout=timeout)
+    credentials_sent = False
+
+    for _ in range(MAX_STEPS):
+        # Themis itself may end the flow on an error page ("Cannot GET")
+        on_themis = urlsplit(response.url).netloc == home
+        if not on_themis:
+            response.raise_for_status()
+        forms = _forms(response)
+
+        if on_themis and not any(_is_saml(form) for form in forms):
+            if "/login" in urlsplit(response.url).path:
+                raise SessionExpired("Login failed: Themis did not accept the SAML response.")
+            return session
+
+        if forms:
+            form = forms[0]
+            fields = dict(form.form_values())
+            names = {i.name for i in form.inputs if i.name}
+            if USER_FIELD in names or PASSWORD_FIELD in names:
+                if credentials_sent:
+                    raise SessionExpired("Login failed: the username or password was rejected.")
+                fields[USER_FIELD] = user
+                fields[PASSWORD_FIELD] = password
+                credentials_sent = True
+            elif not _is_saml(form) and not _is_relay(form):
+                raise TwoFactorRequired(f"the sign-on page at {response.url} needs interaction.")
+
+            action = urljoin(response.url, form.action or response.url)
+            if (form.method or "GET").upper() == "POST":
+                response = session.post(action, data=fields, timeout=timeout)
+            else:
+                response = session.get(action, params=fields, timeout=timeout)
+            continue
+
+        redirect = SCRIPT_REDIRECT.search(response.text)
+        if redirect is None:
+            raise TwoFactorRequired(f"unexpected sign-on page at {response.url}.")
+        response = session.get(urljoin(response.url, redirect.group(1)), timeout=timeout)
+
+    raise SessionExpired(f"Login failed: no session after {MAX_STEPS} steps.")
+
+
+def _forms(response) -> list:
+    """
+    The forms on a page.
+    """
+    if not response.content.strip():
+        return []
+    return lxml.html.document_fromstring(response.content, base_url=response.url).forms
+
+
+def _is_saml(form) -> bool:
+    """
+    Whether a form carries a SAML message (usually posted by a script).
+    """
+    return any(i.name in ("SAMLRequest", "SAMLResponse") for i in form.inputs)
+
+
+def _is_relay(form) -> bool:
+    """
+    Whether a form has only hidden fields, i.e. is submitted by a script.
+    """
+    return all(getattr(i, "type", "hidden") in ("hidden", "submit") for i in form.inputs)
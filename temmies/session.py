@@ -0,0 +1,251 @@
+"""
+HTTP session shared by all objects of a Themis instance.
+"""
+
+from email.utils import parsedate_to_datetime
+from time import sleep, time
+from typing import Callable
+
+from requests import Request, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ConnectTimeout, Timeout
+
+from .cache import HTTPCache
+from .metrics import Metrics
+from .ratelimit import AdaptiveConcurrency, RateLimiter
+from .results import Backoff
+
+BASE_URL = "https://themis.housing.rug.nl"
+
+# (connect, read) timeout in seconds of requests that do not set one
+DEFAULT_TIMEOUT = (10, 60)
+
+# Answers showing that the server is overloaded; retried after a backoff
+RETRY_STATUSES = (429, 502, 503, 504)
+# Methods that may be sent again after the server may have seen them
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Markers of the login flow, in URLs and (a prefix of) HTML bodies
+LOGIN_MARKERS = ("/login", "signon.rug.nl")
+BODY_PREFIX = 4096
+
+
+def login_required(response: Response, stream: bool = False) -> bool:
+    """
+    Whether a response shows that the session is no longer authenticated.
+
+    Looks at the status, the redirects and the Location header; the body is
+    only inspected (its first BODY_PREFIX bytes, undecoded) for HTML that was
+    not streamed, so downloads are never read here.
+    """
+    request_url = response.request.url if response.request is not None else ""
+    if any(marker in request_url for marker in LOGIN_MARKERS):
+        return False
+
+    if response.status_code in (401, 403):
+        return True
+
+    location = response.headers.get("Location", "")
+    urls = [r.headers.get("Location", "") for r in response.history]
+    urls += [location, response.url or ""]
+    if any(marker in url for url in urls for marker in LOGIN_MARKERS):
+        return True
+
+    if stream or "text/html" not in response.headers.get("Content-Type", "").lower():
+        return False
+    return b"signon.rug.nl" in response.content[:BODY_PREFIX]
+
+
+def retry_after(response: Response) -> float | None:
+    """
+    Seconds to wait according to the Retry-After header (a number of
+    seconds or a date), or None if there is none.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that sends every request through a RateLimiter and an
+    AdaptiveConcurrency shared by the session, and sends it again (up to
+    `retries` times, waiting according to `backoff`) when the server is
+    overloaded (429, 502, 503, 504) or does not answer in time.
+
+    A Retry-After header holds the limiter, pausing every thread; waits
+    longer than `max_retry_after` seconds are not retried. Requests that
+    may have been processed (a 502/503/504 or a lost connection) are only
+    sent again if their method is idempotent, so a submission is never
+    made twice.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __init__(
+        self, limiter: RateLimiter, concurrency: AdaptiveConcurrency,
+        retries: int = 3, backoff: Backoff | None = None,
+        timeout=DEFAULT_TIMEOUT, max_retry_after: float = 120,
+        on_retry: Callable[[], None] | None = None, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff or Backoff(initial=0.5, maximum=30, factor=2, jitter=0.2)
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.on_retry = on_retry
+
+    # pylint: disable=too-many-positional-arguments
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        timeout = timeout if timeout is not None else self.timeout
+        delays = iter(self.backoff)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self.concurrency.acquire()
+            response = error = None
+            try:
+                response = super().send(request, stream, timeout, verify, cert, proxies)
+            except (RequestsConnectionError, Timeout) as e:
+                error = e
+            finally:
+                self.concurrency.release(
+                    isinstance(error, Timeout)
+                    or (response is not None and response.status_code in RETRY_STATUSES)
+                )
+
+            wait = retry_after(response) if response is not None else None
+            if (
+                attempt >= self.retries
+                or not self.__retryable(request.method, response, error)
+                or (wait is not None and wait > self.max_retry_after)
+            ):
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                response.close()
+            if wait is not None:
+                self.limiter.hold(wait)
+            else:
+                sleep(next(delays))
+            attempt += 1
+            if self.on_retry is not None:
+                self.on_retry()
+
+    @staticmethod
+    def __retryable(method: str, response: Response | None, error: Exception | None) -> bool:
+        """
+        Whether a failed attempt may be made again.
+        """
+        idempotent = (method or "GET").upper() in IDEMPOTENT_METHODS
+        if isinstance(error, ConnectTimeout):
+            return True  # Nothing was sent
+        if error is not None:
+            return idempotent
+        if response.status_code == 429:
+            return True  # Rejected before being processed
+        return response.status_code in RETRY_STATUSES and idempotent
+
+
+class ThemisSession(Session):
+    """
+    requests.Session with an optional on-disk cache for GET requests.
+
+    Pass `use_cache=False` to any request to bypass the cache.
+
+    Keeps up to `pool_size` connections open per host, so that many
+    threads can share the session without connections being dropped and
+    reopened. `pool_hosts` is the number of hosts whose pools are kept.
+
+    `base_url` is the Themis server that objects using this session talk to.
+
+    Every request is recorded in `metrics`, and sent through a ThrottledAdapter:
+    at most `rate` requests per second (`limiter`, unlimited if None) and at
+    most `pool_size` at a time, fewer while the server is overloaded
+    (`concurrency`), with up to `retries` retries of transient failures.
+    Requests without a timeout get DEFAULT_TIMEOUT.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __init__(
+        self, cache: HTTPCache | None = None, pool_size: int = 10,
+        pool_hosts: int = 10, base_url: str = BASE_URL,
+        rate: float | None = None, retries: int = 3,
+    ):
+        super().__init__()
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+        self.metrics = Metrics()
+        self.limiter = RateLimiter(rate, burst=max(1, round(rate or 1)))
+        self.concurrency = AdaptiveConcurrency(pool_size)
+        adapter = ThrottledAdapter(
+            self.limiter, self.concurrency, retries, on_retry=self.metrics.retried,
+            pool_connections=pool_hosts, pool_maxsize=pool_size,
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    # pylint: disable=arguments-differ
+    def request(self, method, url, *args, use_cache: bool = True, **kwargs):
+        with self.metrics.request(method, url, self.base_url) as record:
+            response = self.__request(record, method, url, *args, use_cache=use_cache, **kwargs)
+            self.metrics.observe(record, response, kwargs.get("stream", False))
+            return response
+
+    def __request(self, record, method, url, *args, use_cache: bool = True, **kwargs):
+        """
+        Send a request, answering it from the cache if possible.
+        """
+        cache = self.cache
+        if not use_cache or args or not self.__cacheable(method, url, kwargs):
+            return super().request(method, url, *args, **kwargs)
+
+        record.cache = "miss"
+        entry = cache.lookup(url)
+        if entry and cache.is_fresh(entry):
+            cached = cache.respond(url, Request(method, url).prepare())
+            if cached is not None:
+                record.cache = "hit"
+                return cached
+
+        original_headers = kwargs.pop("headers", None)
+        headers = dict(original_headers or {})
+        if entry:
+            headers.update(cache.conditional_headers(entry))
+
+        response = super().request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            cache.revalidated(url)
+            cached = cache.respond(url, response.request)
+            if cached is not None:
+                record.cache = "revalidated"
+                return cached
+            # The body disappeared in the meantime, fetch it again
+            response = super().request(method, url, headers=original_headers, **kwargs)
+
+        if response.status_code == 200 and not response.history:
+            cache.store(url, response)
+        return response
+
+    def __cacheable(self, method, url, kwargs) -> bool:
+        """
+        Whether a request may be answered from the cache.
+        """
+        if self.cache is None or method.upper() != "GET":
+            return False
+        if kwargs.get("stream") or kwargs.get("params"):
+            return False
+        return self.cache.accepts(url)
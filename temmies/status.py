@@ -0,0 +1,76 @@
+"""
+Statuses of many assignments, as one table.
+"""
+
+import csv
+from typing import Any, Iterator, TextIO
+
+from .parsing import STATUS_KEYS
+
+# leading, best, latest, first_pass, last_pass
+COLUMNS = tuple(STATUS_KEYS.values())
+
+
+class StatusMatrix:
+    """
+    Table with a row per assignment and a column per status key, stored
+    by column: `paths`, `titles`, one list per key in `values` and
+    `errors` (None for assignments whose status could be read).
+    """
+
+    def __init__(self, columns: tuple[str, ...] = COLUMNS):
+        self.columns = tuple(columns)
+        self.paths: list[str] = []
+        self.titles: list[str] = []
+        self.values: dict[str, list[Any]] = {column: [] for column in self.columns}
+        self.errors: list[str | None] = []
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, column: str) -> list[Any]:
+        return self.values[column]
+
+    def __repr__(self):
+        return f"StatusMatrix({len(self)} assignments, columns={self.columns})"
+
+    def append(
+        self, path: str, title: str,
+        status: dict[str, Any] | None, error: str | None = None
+    ) -> None:
+        """
+        Add the status of an assignment (missing keys are left empty).
+        """
+        status = status or {}
+        self.paths.append(path)
+        self.titles.append(title)
+        for column in self.columns:
+            self.values[column].append(status.get(column))
+        self.errors.append(error)
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """
+        Iterate over the rows as (path, title, *columns, error).
+        """
+        return zip(
+            self.paths, self.titles,
+            *(self.values[column] for column in self.columns),
+            self.errors,
+        )
+
+    def to_csv(self, file: str | TextIO) -> None:
+        """
+        Write the table as CSV to a path or an open file.
+        Submissions are written as their URL.
+        """
+        if isinstance(file, str):
+            with open(file, "w", newline="", encoding="utf-8") as f:
+                self.to_csv(f)
+            return
+
+        writer = csv.writer(file)
+        writer.writerow(("path", "title", *self.columns, "error"))
+        for row in self.rows():
+            writer.writerow([
+                "" if value is None else getattr(value, "url", value) for value in row
+            ])
@@ -4,82 +4,65 @@
 File to define the Submission class
 """
 
-from typing import Optional
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+from .metrics import parsing
+from .parsing import SubmissionPage
+from .session import BASE_URL
 
 class Submission:
     """
     Submission class
 
+    A lightweight handle: the page is only fetched on first use
+    (or with load()).
+
     Methods:
     get_test_cases: Get a dict of test cases status
     get_info: Submission information (in details)
     get_files: Get a list of uploaded files (as names)
     """
+
+    __slots__ = ("url", "__session", "__page")
+
     def __init__(self, url: str, session):
-        self.url = "https://themis.housing.rug.nl" + url
+        base_url = getattr(session, "base_url", BASE_URL)
+        self.url = url if url.startswith("http") else base_url + url
         self.__session = session
-        self.__request = self.__session.get(self.url)
-        self.__raw = BeautifulSoup(self.__request.text, "lxml")
-        self.__info = None
+        self.__page: SubmissionPage | None = None
 
-    def __clean(self, text: str, value: bool = False) -> str:
-        """Clean text"""
-        clean = text.replace("\t", "").replace("\n", "")
-        if value:
-            return clean.strip()
-        return clean.replace(" ", "_").replace(":", "").lower().strip()
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the page has been fetched"""
+        return self.__page is not None
+
+    def load(self, force: bool = False) -> "Submission":
+        """Fetch and parse the submission page"""
+        if self.__page is None or force:
+            response = self.__session.get(self.url)
+            if response.status_code != 200:
+                raise ConnectionError(f"Failed to retrieve submission '{self.url}'.")
+            with parsing(response):
+                self.__page = SubmissionPage.from_html(response.text)
+        return self
 
     def get_test_cases(self) -> dict[str, str]:
         """Get a dict of test cases status"""
-        cases = self.__raw.find("div", class_=lambda x: x and "sub-cases" in x.split())
-        if not cases:
-            return {}
-
-        cases = cases.find("div", class_="cfg-container")
-        cases = cases.find("table")
-
-        results = {}
-        for entry in cases.find_all("tr", class_="sub-casetop"):
-            name = entry.find("td", class_="sub-casename").text
-            status = entry.find(
-                "td", class_=lambda x: x and "status-icon" in x.split()
-            ).text
-            results[name.strip()] = self.__clean(status)
-
-        return results
+        self.load()
+        return dict(self.__page.cases)
 
     def get_info(self) -> Optional[dict[str, str]]:
         """Submission information (in details)"""
-        if self.__info:
-            return self.__info
-
-        for div in self.__raw.find_all("div", class_="subsec round shade"):
-            h4 = div.find("h4", class_=lambda x: x and "info" in x.split())
-            if h4 and "Details" in h4.text:
-                info = div.find("div", class_="cfg-container")
-                info_lines = info.find_all("div", class_="cfg-line")
-                self.__info = {
-                    self.__clean(
-                        key := line.find("span", class_="cfg-key").text
-                    ): (
-                        self.__clean(line.find("span", class_="cfg-val").text, value=True)
-                        if "Files" not in key
-                        else [
-                            (self.__clean(a.text), a["href"])
-                            for a in line.find("span", class_="cfg-val").find_all("a")
-                        ]
-                    )
-                    for line in info_lines
-                }
-                return self.__info
-        return None
+        self.load()
+        return self.__page.info
 
     def get_files(self) -> Optional[list[str]]:
         """Get a list of uploaded files in the format [(name, url)]"""
-        if not self.__info:
-            self.__info = self.get_info()
-        return self.__info.get("files", None)
+        info = self.get_info()
+        return info.get("files", None) if info else None
+
+    def __repr__(self):
+        return f"Submission({self.url})"
 
     # Deprecated methods
     def info(self):
@@ -102,3 +85,49 @@ class Submission:
         """
         print("This method is deprecated and will be deleted in soon. Use get_files instead.")
         return self.get_files()
+
+
+def package_files(
+    files: list[str], suffixes: dict[str, str], judge: bool = True
+) -> tuple[list[tuple[str, tuple[str, bytes]]], dict[str, str]]:
+    """
+    Read files for the submission form, which accepts the
+    given suffixes ({suffix: language}).
+    Returns the files to upload and the form data.
+    """
+    packaged_files = []
+    found_type = ""
+
+    for file in files:
+        for suffix, lang in suffixes.items():
+            if file.endswith(suffix):
+                found_type = lang
+                break
+        if not found_type:
+            print("WARNING: File type not recognized")
+
+        with open(file, "rb") as f:
+            packaged_files.append((found_type, (file, f.read())))
+
+    data: dict[str, Any] = {
+        "judgenow": "true" if judge else "false",
+        "judgeLanguage": found_type if found_type else "none"
+    }
+    return packaged_files, data
+
+
+def fetch_submissions(session, urls: Iterable[str], workers: int = 8) -> list[Submission]:
+    """
+    Load many submissions in parallel, with `workers` threads.
+    Returns them in the order of `urls`; a URL given twice gives the same object.
+    Raises the first error met.
+    """
+    submissions: dict[str, Submission] = {}
+    ordered = []
+    for url in urls:
+        submission = Submission(url, session)
+        ordered.append(submissions.setdefault(submission.url, submission))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(submissions)))) as pool:
+        list(pool.map(Submission.load, submissions.values()))
+    return ordered
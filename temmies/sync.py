@@ -0,0 +1,170 @@
+"""
+Incremental mirroring of test cases and files, based on a manifest.
+"""
+
+import os
+import threading
+from json import dump, load
+from typing import Any, Callable
+
+from .cache import conditional_headers
+from .download import DownloadCallback, DownloadPool, DownloadResult
+
+
+class Manifest:
+    """
+    Record of the files mirrored into a directory, kept in
+    <directory>/.temmies-manifest.json.
+
+    Maps each file (relative to the directory) to its remote url, size,
+    ETag, Last-Modified and sha256.
+    """
+
+    FILENAME = ".temmies-manifest.json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILENAME)
+        self.__lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries: dict[str, dict[str, Any]] = load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        """
+        Get the entry for a file.
+        """
+        with self.__lock:
+            return self.entries.get(name)
+
+    def set(self, name: str, entry: dict[str, Any]) -> None:
+        """
+        Record a file.
+        """
+        with self.__lock:
+            self.entries[name] = entry
+
+    def remove(self, name: str) -> None:
+        """
+        Forget a file.
+        """
+        with self.__lock:
+            self.entries.pop(name, None)
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to disk.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self.__lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class SyncResult(DownloadResult):
+    """
+    List of the files written by a sync, like DownloadResult.
+    The files are further split into `added` and `updated`; `unchanged`
+    lists the files that were up to date and `removed` those that no longer
+    exist remotely (deleted from disk only if requested).
+    """
+
+    def __init__(self, downloaded=(), failed: list[dict] | None = None):
+        super().__init__(downloaded, failed)
+        self.added: list[str] = []
+        self.updated: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed: list[str] = []
+
+    def __repr__(self):
+        return (
+            f"SyncResult(added={self.added}, updated={self.updated}, "
+            f"unchanged={len(self.unchanged)}, removed={self.removed}, failed={self.failed})"
+        )
+
+
+class Sync:
+    """
+    Mirrors files into `directory`, only fetching files that are new or
+    changed since the last run, according to the manifest.
+    """
+
+    def __init__(
+        self, session, directory: str,
+        workers: int = 4, callback: DownloadCallback | None = None
+    ):
+        self.directory = directory
+        self.manifest = Manifest(directory)
+        self.__pool = DownloadPool(session, workers, callback)
+        self.__seen: set[str] = set()
+        self.__status: dict[str, str] = {}
+        self.__lock = threading.Lock()
+
+    def add(self, title: str, url: str, destination: str) -> None:
+        """
+        Schedule a file to be brought up to date.
+        """
+        name = os.path.relpath(destination, self.directory).replace(os.sep, "/")
+        entry = self.manifest.get(name)
+
+        headers = None
+        if (
+            entry and entry.get("url") == url
+            and os.path.isfile(destination)
+            and os.path.getsize(destination) == entry.get("size")
+        ):
+            headers = conditional_headers(entry)
+
+        with self.__lock:
+            self.__seen.add(name)
+
+        def done(meta: dict[str, Any] | None) -> None:
+            if meta is None:
+                status = "unchanged"
+            else:
+                status = "updated" if entry else "added"
+                self.manifest.set(name, {"url": url, **meta})
+            with self.__lock:
+                self.__status[destination] = status
+
+        self.__pool.add(title, url, destination, headers=headers or None, done=done)
+
+    def run(self, title: str, url: str, destination: str, fn: Callable, *args) -> None:
+        """
+        Schedule another task on the same pool (see DownloadPool.run).
+        """
+        self.__pool.run(title, url, destination, fn, *args)
+
+    def finish(self, delete: bool = False) -> SyncResult:
+        """
+        Wait for all files, then handle the files that disappeared remotely
+        and save the manifest.
+        """
+        downloaded = self.__pool.wait()
+        result = SyncResult(downloaded, downloaded.failed)
+        for destination, status in sorted(self.__status.items()):
+            getattr(result, status).append(destination)
+
+        # Files under a page that could not be read were not seen, but are not gone
+        unknown = [
+            os.path.relpath(failure["destination"], self.directory).replace(os.sep, "/")
+            for failure in result.failed
+        ]
+        for name in sorted(set(self.manifest.entries) - self.__seen):
+            if any(u in (".", name) or name.startswith(u + "/") for u in unknown):
+                continue
+            destination = os.path.join(self.directory, *name.split("/"))
+            result.removed.append(destination)
+            if delete:
+                try:
+                    os.remove(destination)
+                except FileNotFoundError:
+                    pass
+                self.manifest.remove(name)
+
+        self.manifest.save()
+        return result
@@ -2,22 +2,36 @@
 # pyright: basic
 from __future__ import annotations
 
-from requests import Session
-from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from json import dumps
+from time import monotonic, time
+from typing import Any, Callable, Iterator
+
+from requests import Session
+from .cache import HTTPCache
+from .cookies import CookieStore, expires_at
+from .course import Course
+from .exercise_group import ExerciseGroup
+from .group import Group
+from .metrics import RequestRecord, parsing
+from .parsing import GroupPage
+from .ratelimit import RateLimiter
+from .registry import IdentityMap
+from .saml import saml_login
+from .results import Backoff
+from .session import BASE_URL, ThemisSession, login_required
+from .submission import Submission, fetch_submissions
+from .watcher import SubmissionWatcher
 from .year import Year
-import getpass
-import keyring
 
-from .exceptions import SessionExpired, SessionRefreshed
+from .exceptions import IllegalAction, SessionExpired, TwoFactorRequired
 
-class Themis:
+# Replaces the password once it has been used
+REMOVED_PASSWORD = "I-HAVE-BEEN-REMOVED"
+
+class Themis:  # pylint: disable=too-many-instance-attributes
     """
     Main class for interacting with Themis.
     - login: Login to Themis
@@ -25,22 +39,75 @@ class Themis:
     - all_years: Get all years
     """
 
-    def __init__(self, cookies: dict = None, user=None):
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __init__(
+        self,
+        cookies: dict = None,
+        user=None,
+        cache_dir: str | None = None,
+        cache_ttl: float = 300,
+        cache_size: int = 64 * 1024 * 1024,
+        registry_size: int = 4096,
+        cookie_file: str | None = None,
+        refresh_margin: float = 300,
+        browserless: bool = False,
+        pool_size: int = 10,
+        base_url: str = BASE_URL,
+        on_request: Callable[[RequestRecord], None] | None = None,
+        rate: float | None = None,
+        retries: int = 3,
+    ):
         """
         Initialize Themis object, logging in with the given user.
 
         Args:
             user (str): Username to login with.
+            cache_dir (str): Directory for an on-disk cache of navigation and
+                group pages. Caching is disabled if not given. Entries are kept
+                per `user`; do not share a directory between accounts when
+                logging in with cookies only.
+            cache_ttl (float): Seconds a cached page is used without revalidation.
+            cache_size (int): Maximum size of the cache in bytes.
+            registry_size (int): Maximum number of objects kept in the identity map.
+            cookie_file (str): File to keep the session cookies in between runs.
+                Used when no cookies are given; updated after every login.
+            refresh_margin (float): Seconds before the cookies expire at which
+                they are refreshed in the background.
+            browserless (bool): Log in with plain HTTP requests instead of a
+                browser when possible (needs `user`).
+            pool_size (int): Connections kept open per host. Raise it to the
+                number of threads sharing this instance.
+            base_url (str): Themis server to use, e.g. a local stand-in for testing.
+            on_request (callable): Called with the RequestRecord of every
+                request, e.g. to export metrics (see `stats`).
+            rate (float): Maximum requests per second, shared by all objects
+                created from this instance. Unlimited if not given.
+            retries (int): Times a request is retried when Themis is
+                overloaded (429, 502, 503, 504) or does not answer in time.
 
         Attributes:
             user (str): Username.
             password (str): Password, retrieved from keyring.
             base_url (str): Base URL of the Themis website.
-            session (requests.Session): Authenticated session.
+            session (ThemisSession): Authenticated session.
+            cache (HTTPCache): On-disk page cache, or None.
+            registry (IdentityMap): Objects already created, by path.
+            cookie_store (CookieStore): Persistent cookies, or None.
         """
-        self.base_url = "https://themis.housing.rug.nl"
-        self._relogin_attempted = False
-        self.session = self._setup_agent()
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+        self._refresh_lock = threading.RLock()
+        self.cache = (
+            HTTPCache(cache_dir, cache_ttl, cache_size, namespace=user) if cache_dir else None
+        )
+        self.registry = IdentityMap(registry_size)
+        self.cookie_store = CookieStore(cookie_file) if cookie_file else None
+        self.refresh_margin = refresh_margin
+        self._refresh_timer: threading.Timer | None = None
+        self.browserless = browserless
+        self.session = self._setup_agent(pool_size, rate, retries)
+        if on_request is not None:
+            self.session.metrics.add_callback(on_request)
         
         self.user, self.password = None, None
         
@@ -49,9 +116,13 @@ class Themis:
             self.user = user
             self.password = self._get_password()
         
+        if not cookies and self.cookie_store is not None:
+            cookies = self.cookie_store.load()
+
         # Reusing session logic
         if not cookies:
-            self.session = self.login(self.session)
+            self.login(self.session)
+            self._cookies_changed()
         else:
             self.session.cookies.update(cookies)
             if not self.check_session():
@@ -62,11 +133,17 @@ class Themis:
                     raise SessionExpired(
                         "Provided cookies are stale or malformed and re-authentication failed. Please create a new Themis() instance without cookies."
                     )
+            else:
+                self._schedule_refresh()
     
     def _get_password(self) -> str:
         """
         Retrieve the password from the keyring, prompting the user if not found.
         """
+        # Deferred: keyring is slow to import and only needed to log in
+        import getpass  # pylint: disable=import-outside-toplevel
+        import keyring  # pylint: disable=import-outside-toplevel
+
         password = keyring.get_password(f"{self.user}-temmies", self.user)
         if not password:
             print(f"Password for user '{self.user}' not found in keyring.")
@@ -76,9 +153,13 @@ class Themis:
             print("Password saved securely in keyring.")
         return password
 
-    def _setup_agent(self) -> Session:
+    def _setup_agent(
+        self, pool_size: int = 10, rate: float | None = None, retries: int = 3
+    ) -> ThemisSession:
 
-        session = Session()
+        session = ThemisSession(
+            self.cache, pool_size, base_url=self.base_url, rate=rate, retries=retries
+        )
 
         user_agent = (
             "Mozilla/5.0 (X11; Linux x86_64) "
@@ -88,44 +169,40 @@ class Themis:
 
         session.headers.update({"User-Agent": user_agent})
 
-        def _raise_if_session_expired(response, *args, **kwargs):  # noqa: ANN001
-            request_url = getattr(getattr(response, "request", None), "url", "") or ""
-            final_url = getattr(response, "url", "") or ""
-
-            should_reauth = False
-            
-            if "/login" in final_url and ("/login" not in request_url):
-                should_reauth = True
-            elif getattr(response, "status_code", None) in (401, 403):
-                should_reauth = True
-            else:
-                content_type = (response.headers.get("Content-Type") or "").lower()
-                if "text/html" in content_type and ("/login" not in request_url):
-                    body = response.text or ""
-                    if "signon.rug.nl" in body:
-                        should_reauth = True
-            
-            if should_reauth:
-                if self._relogin_attempted:
-                    raise SessionRefreshed(
-                        "Session expired and automatic re-login already attempted. Please create a new Themis() instance."
-                    )
-                
-                self._relogin_attempted = True
-                
-                self.refresh_cookies()
-                
-                raise SessionRefreshed(
-                    "Session expired. Cookies have been refreshed. Please retry your request."
+        def _refresh_if_session_expired(response, *_args, **kwargs):  # noqa: ANN001
+            if getattr(self._local, "bypass", False):
+                return response
+            if not login_required(response, kwargs.get("stream", False)):
+                return response
+            if getattr(self._local, "replaying", False):
+                raise SessionExpired(
+                    "Session expired again right after refreshing the cookies. "
+                    "Please create a new Themis() instance."
                 )
 
-            return response
+            def with_current_cookies(request):
+                request = request.copy()
+                request.headers.pop("Cookie", None)
+                request.prepare_cookies(self.session.cookies)
+                return request
 
-        # clean hook solution
-        hooks = session.hooks.get("response", [])
-        if _raise_if_session_expired not in hooks:
-            hooks.append(_raise_if_session_expired)
-            session.hooks["response"] = hooks
+            # Only one thread logs in again; the others wait for it and
+            # just replay their request with the new cookies
+            with self._refresh_lock:
+                replay = with_current_cookies(response.request)
+                if replay.headers.get("Cookie") == response.request.headers.get("Cookie"):
+                    self.refresh_cookies()
+                    replay = with_current_cookies(response.request)
+            response.close()
+
+            self.session.metrics.retried()
+            self._local.replaying = True
+            try:
+                return self.session.send(replay, **kwargs)
+            finally:
+                self._local.replaying = False
+
+        session.hooks["response"].append(_refresh_if_session_expired)
 
         return session
 
@@ -137,42 +214,141 @@ class Themis:
         # fuck you matt
         navigation_url = f"{self.base_url}/api/navigation/"
         
-        original_hooks = self.session.hooks.get("response", [])
-        self.session.hooks["response"] = []
-        
-        try:
-            response = self.session.get(navigation_url)
-            
-            if response.status_code != 200:
-                return False
+        with self._without_expiry_hook():
+            response = self.session.get(navigation_url, use_cache=False)
 
-            try:
-                response.json()
-            except ValueError:
-                return False
+        if response.status_code != 200:
+            return False
 
-            return True
-        finally:
-            self.session.hooks["response"] = original_hooks
+        try:
+            response.json()
+        except ValueError:
+            return False
+
+        return True
     
     def refresh_cookies(self) -> None:
         """
         Refresh/replace session cookies by re-authenticating.
         Raises SessionExpired if re-authentication fails.
+
+        The cookies are replaced in place on the one shared session, so every
+        Year, Group and Submission created from this instance sees them.
+        Concurrent refreshes are serialized.
         """
-        self.session.cookies.clear()
-        self._relogin_attempted = False
-        self.session = self.login(self.session)
-        if not self.check_session():
-            raise SessionExpired(
-                "Failed to refresh session cookies. Re-authentication was attempted but the session is still invalid."
-            )
+        with self._refresh_lock:
+            self.session.cookies.clear()
+            self.login(self.session)
+            if not self.check_session():
+                raise SessionExpired(
+                    "Failed to refresh session cookies. Re-authentication was attempted but the session is still invalid."
+                )
+            self._cookies_changed()
+
+    def _cookies_changed(self) -> None:
+        """
+        Persist freshly obtained cookies and plan their refresh.
+        """
+        if self.cookie_store is not None:
+            self.cookie_store.save(self.session.cookies)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        """
+        Refresh the cookies in the background `refresh_margin` seconds
+        before the first of them expires. Cookies without an expiry, or
+        that expire sooner than that, are refreshed once a request hits the
+        expiry instead.
+        """
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+        expiry = expires_at(self.session.cookies)
+        if expiry is None:
+            return
+        delay = expiry - self.refresh_margin - time()
+        if delay <= 0:
+            return
+
+        self._refresh_timer = threading.Timer(delay, self.__refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def __refresh_in_background(self) -> None:
+        """
+        Proactive refresh of the cookies.
+        """
+        try:
+            self.refresh_cookies()
+        except SessionExpired:
+            # Left to the expiry hook once a request fails
+            pass
+
+    def close(self) -> None:
+        """
+        Stop the background refresh of the cookies and write the cache index.
+        """
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self.cache is not None:
+            self.cache.close()
     
         
+    @contextmanager
+    def _without_expiry_hook(self) -> Iterator[None]:
+        """
+        Suspend the expiry hook (in this thread), which would otherwise
+        try to log in again while checking or logging in.
+        """
+        self._local.bypass = True
+        try:
+            yield
+        finally:
+            self._local.bypass = False
+
     def login(self, session: Session) -> Session:
+        """
+        Login to Themis. With `browserless`, this is tried over plain HTTP
+        first, falling back to the browser if the sign-on asks for 2FA.
+        """
+        if self.browserless and self.user:
+            try:
+                return self.__browserless_login(session)
+            except TwoFactorRequired as e:
+                print(f"{e} Falling back to the browser.")
+                self.password = self._get_password()
+        return self.__browser_login(session)
+
+    def __browserless_login(self, session: Session) -> Session:
+        """
+        Login to Themis through the SAML flow, without a browser.
+        """
+        if self.password in (None, REMOVED_PASSWORD):
+            self.password = self._get_password()
+        try:
+            with self._without_expiry_hook():
+                saml_login(session, self.base_url, self.user, self.password)
+        finally:
+            # security, also when the login failed
+            self.password = REMOVED_PASSWORD
+        return session
+
+    def __browser_login(self, session: Session) -> Session:
         """
         Login to Themis by spawning a selenium browser
         """
+        # Deferred: selenium is slow to import and not needed with saved cookies
+        # pylint: disable=import-outside-toplevel, too-many-locals
+        from selenium import webdriver
+        from selenium.common.exceptions import (
+            NoSuchElementException, StaleElementReferenceException, TimeoutException
+        )
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         login_url = f"{self.base_url}/login"
         driver = webdriver.Chrome()
 
@@ -192,7 +368,10 @@ class Themis:
                 if self.user and not user_field.get_attribute("value"):
                     user_field.clear()
                     user_field.send_keys(self.user)
-                if self.password and not pass_field.get_attribute("value"):
+                if (
+                    self.password not in (None, REMOVED_PASSWORD)
+                    and not pass_field.get_attribute("value")
+                ):
                     pass_field.clear()
                     pass_field.send_keys(self.password)
             
@@ -205,16 +384,38 @@ class Themis:
             print(f"Encountered an error: {e}")
         finally:
             # security
-            self.password = "I-HAVE-BEEN-REMOVED"
+            self.password = REMOVED_PASSWORD
             cookies = driver.get_cookies()
             driver.quit()
 
-        # Add all cookies to the session.
+        # Add all cookies to the session, keeping their expiry.
         for cookie in cookies:
-            session.cookies.set(name=cookie["name"], value=cookie["value"])
+            session.cookies.set(
+                name=cookie["name"],
+                value=cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+                secure=cookie.get("secure", False),
+                expires=cookie.get("expiry"),
+            )
 
         return session
 
+    def stats(self) -> dict[str, Any]:
+        """
+        Metrics of the requests made so far (the last 10000):
+        - requests, errors, retries, bytes, and latency/parse time percentiles,
+          overall and per URL template (`templates`, e.g. 'GET /course/{path}')
+        - cache: answers from the page cache ('hit'), revalidated with a 304
+          ('revalidated') and fetched ('miss')
+        - statuses: count per HTTP status (or exception name)
+        - operations: per public method (get_items, get_status, submit,
+          download_tcs, download_files) the number of calls and the seconds
+          spent in total (`wall`), waiting for responses (`network`, summed
+          over parallel downloads) and parsing (`parse`)
+        """
+        return self.session.metrics.stats()
+
     def get_session_cookies(self):
         """
         Get the session cookies in json
@@ -227,7 +428,149 @@ class Themis:
         """
         year_path = f"{start_year}-{end_year}"
 
-        return Year(self.session, year_path)
+        return Year(self.session, year_path, self.registry)
+
+    def get_by_path(self, path: str) -> Group:
+        """
+        Gets the Course, Group or ExerciseGroup at a path
+        (e.g. '/2023-2024/adinc-ai/labs/lab3') with a single request.
+        Objects already listed through get_items are reused, so their
+        type follows the navigation API.
+        """
+        path = IdentityMap.canonical(path)
+        parts = path.strip("/").split("/")
+        if len(parts) < 2:
+            raise ValueError(f"Path '{path}' does not point to a course or group.")
+
+        item = self.registry.get("group", path)
+        if item is not None:
+            return item
+
+        response = self.session.get(f"{self.base_url}/course{path}")
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve page for '{path}'.")
+        with parsing(response):
+            page = GroupPage.from_html(response.text)
+
+        # The breadcrumbs give the titles of the page and its ancestors
+        titles = {
+            IdentityMap.canonical(href): title
+            for href, title in page.breadcrumbs if href
+        }
+
+        year = Year(self.session, parts[0], self.registry)
+        course_path = f"/{parts[0]}/{parts[1]}"
+        parent = self.registry.get("group", course_path) or self.registry.put(
+            "group", course_path,
+            Course(self.session, course_path, titles.get(course_path, parts[1]), year),
+        )
+
+        for depth in range(2, len(parts)):
+            group_path = "/" + "/".join(parts[:depth + 1])
+            group = self.registry.get("group", group_path)
+            if group is None:
+                title = titles.get(group_path, parts[depth])
+                # Assignments have a submission form, test cases or downloads,
+                # though the form may be missing (e.g. after the deadline)
+                if group_path == path and (page.form or page.test_cases or page.files):
+                    group = ExerciseGroup(self.session, group_path, title, parent)
+                else:
+                    group = Group(self.session, group_path, title, parent)
+                group = self.registry.put("group", group_path, group)
+            parent = group
+
+        if not parent.is_loaded:
+            parent._page = page  # pylint: disable=protected-access
+        return parent
+
+    def fetch_submissions(self, urls: list[str], workers: int = 8) -> list[Submission]:
+        """
+        Loads the submissions at `urls` (paths or full URLs) in parallel.
+        """
+        return fetch_submissions(self.session, urls, workers)
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def submit_many(
+        self,
+        jobs: list[tuple],
+        workers: int = 4,
+        rate: float = 1.0,
+        wait: bool = True,
+        backoff: Backoff | None = None,
+        timeout: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Submit many jobs, each a tuple (group path, files[, judge[, sudo]]).
+
+        Submissions are made by `workers` threads, at most `rate` per second.
+        If `wait` is set, all results are then awaited through one
+        SubmissionWatcher (raising no errors: a job that did not finish
+        within `timeout` seconds gets a TimeoutError as its error).
+
+        Returns one dict per job, in order, with 'path', 'url' (of the
+        submission), 'results' (per test case), 'passed' and 'error'.
+        """
+        limiter = RateLimiter(rate)
+        # Fill in the defaults: (path, files, judge, sudo)
+        jobs = [(tuple(job) + (True, None)[len(job) - 2:])[:4] for job in jobs]
+
+        def submit(job: tuple) -> dict[str, Any]:
+            path, files, judge, sudo = job
+            outcome = {"path": path, "url": None, "results": None, "passed": None, "error": None}
+            try:
+                group = self.get_by_path(path)
+                limiter.acquire()
+                url = group.submit(files, judge=judge, wait=False, sudo=sudo)
+                if url is None:
+                    raise IllegalAction(f"Submission to '{path}' was not accepted.")
+                outcome["url"] = url
+            # Any error (e.g. SessionExpired) fails this job, not the batch
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                outcome["error"] = e
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            outcomes = list(pool.map(submit, jobs))
+
+        if wait:
+            judged = [outcome for job, outcome in zip(jobs, outcomes) if outcome["url"] and job[2]]
+            self.__await_results(judged, backoff, timeout)
+        return outcomes
+
+    def __await_results(
+        self, outcomes: list[dict[str, Any]], backoff: Backoff | None, timeout: float | None
+    ) -> None:
+        """
+        Wait for the submissions of submit_many and fill in their results.
+        """
+        deadline = monotonic() + timeout if timeout is not None else None
+        with SubmissionWatcher(self.session, backoff) as watcher:
+            futures = [(outcome, watcher.watch(outcome["url"])) for outcome in outcomes]
+            for outcome, future in futures:
+                remaining = None if deadline is None else max(0.0, deadline - monotonic())
+                try:
+                    results = future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    outcome["error"] = TimeoutError(
+                        f"Submission '{outcome['url']}' was not judged within {timeout}s."
+                    )
+                    continue
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    outcome["error"] = e
+                    continue
+                outcome["results"] = results
+                outcome["passed"] = all(result is True for result in results.values())
+
+    def invalidate(self, path: str) -> None:
+        """
+        Forget everything known about a path (e.g. '/2023-2024/adinc-ai/labs'),
+        so it is fetched again on the next lookup.
+        """
+        self.registry.invalidate(path)
+        if self.cache:
+            path = IdentityMap.canonical(path)
+            self.cache.invalidate(f"{self.base_url}/course{path}")
+            self.cache.invalidate(f"{self.base_url}/api/navigation{path}")
 
     def all_years(self) -> list:
         """
@@ -238,10 +581,11 @@ class Themis:
         if response.status_code != 200:
             raise ConnectionError("Failed to retrieve years from Themis API.")
 
-        years_data = response.json()
+        with parsing(response):
+            years_data = response.json()
         years = []
         for year_info in years_data:
             if year_info.get("visible", False):
                 year_path = year_info["path"].strip("/")
-                years.append(Year(self.session, year_path))
+                years.append(Year(self.session, year_path, self.registry))
         return years
@@ -0,0 +1,177 @@
+"""
+Waiting for many submissions at once.
+"""
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import Callable, Iterator
+
+from .metrics import parsing
+from .results import Backoff, parse_results
+from .session import BASE_URL
+
+# Called with (url, results) once a submission has been judged.
+WatchCallback = Callable[[str, dict[int, bool | None]], None]
+
+
+class _Watch:  # pylint: disable=too-few-public-methods
+    """
+    A submission being watched.
+    """
+
+    def __init__(self, url: str, intervals: Iterator[float]):
+        self.url = url
+        self.intervals = intervals
+        self.future: Future = Future()
+
+
+class SubmissionWatcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Polls the result pages of many submissions (as returned by
+    Group.submit(wait=False)) from a single background thread.
+
+    Each submission is polled with its own backoff, but never more often
+    than all pending submissions together allow under `rate` polls per
+    second, so the poll load stays the same however many are waiting.
+    """
+
+    def __init__(self, session, backoff: Backoff | None = None, rate: float = 2.0):
+        self.session = session
+        self.backoff = backoff or Backoff()
+        self.rate = rate
+        # (next poll time, sequence number, watch)
+        self.__queue: list[tuple[float, int, _Watch]] = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread: threading.Thread | None = None
+        self.__closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of submissions still being watched.
+        """
+        with self.__condition:
+            return len(self.__queue)
+
+    def watch(self, url: str, callback: WatchCallback | None = None) -> Future:
+        """
+        Start watching a submission.
+        Returns a future that resolves to its test case results;
+        `callback(url, results)` is called as well once it has been judged.
+        """
+        if not url.startswith("http"):
+            url = getattr(self.session, "base_url", BASE_URL) + url
+
+        watch = _Watch(url, iter(self.backoff))
+        if callback:
+            def notify(future: Future) -> None:
+                if not future.cancelled() and future.exception() is None:
+                    callback(url, future.result())
+            watch.future.add_done_callback(notify)
+
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("SubmissionWatcher has been closed.")
+            heapq.heappush(self.__queue, (monotonic(), next(self.__counter), watch))
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__run, name="temmies-watcher", daemon=True
+                )
+                self.__thread.start()
+            self.__condition.notify()
+        return watch.future
+
+    def close(self) -> None:
+        """
+        Stop watching; pending futures are cancelled.
+        """
+        with self.__condition:
+            self.__closed = True
+            for _, _, watch in self.__queue:
+                watch.future.cancel()
+            self.__queue.clear()
+            self.__condition.notify()
+            thread = self.__thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __run(self) -> None:
+        """
+        Poll whichever submission is due next, until none are left.
+        """
+        try:
+            while True:
+                with self.__condition:
+                    while True:
+                        if not self.__queue:
+                            self.__thread = None
+                            return
+                        due = self.__queue[0][0] - monotonic()
+                        if due <= 0:
+                            break
+                        self.__condition.wait(due)
+                    _, _, watch = heapq.heappop(self.__queue)
+
+                if watch.future.cancelled():
+                    continue
+
+                # Any error (e.g. SessionExpired) fails this submission only
+                try:
+                    results, done = self.__poll(watch.url)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    self.__resolve(watch, error=e)
+                    continue
+
+                if done:
+                    self.__resolve(watch, results)
+                    continue
+
+                with self.__condition:
+                    if self.__closed:
+                        watch.future.cancel()
+                        continue
+                    # Spread the polls of everything pending within the rate limit
+                    interval = max(next(watch.intervals), (len(self.__queue) + 1) / self.rate)
+                    heapq.heappush(
+                        self.__queue, (monotonic() + interval, next(self.__counter), watch)
+                    )
+        finally:
+            # Let the next watch() start a thread, even if this one died
+            with self.__condition:
+                if self.__thread is threading.current_thread():
+                    self.__thread = None
+
+    @staticmethod
+    def __resolve(
+        watch: _Watch, results: dict[int, bool | None] | None = None,
+        error: Exception | None = None
+    ) -> None:
+        """
+        Complete the future of a watch, unless it was cancelled meanwhile.
+        """
+        if not watch.future.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            watch.future.set_exception(error)
+        else:
+            watch.future.set_result(results)
+
+    def __poll(self, url: str) -> tuple[dict[int, bool | None], bool]:
+        """
+        Fetch and parse a result page.
+        """
+        response = self.session.get(url)
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve submission result '{url}'.")
+        with parsing(response):
+            return parse_results(response.text)
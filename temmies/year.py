@@ -2,36 +2,62 @@
 This module defines the Year class for managing academic year courses.
 """
 
-from bs4 import BeautifulSoup
 from .course import Course
+from .metrics import parsing
+from .parsing import GroupPage
+from .registry import IdentityMap
+from .session import BASE_URL
 
 
 class Year:
     """
     Represents an academic year.
     """
-    def __init__(self, session, year_path: str):
+    def __init__(self, session, year_path: str, registry: IdentityMap | None = None):
         self.session = session
         self.year_path = year_path  # e.g., '2023-2024'
-        self.base_url = "https://themis.housing.rug.nl"
+        self.registry = registry
+        self.base_url = getattr(session, "base_url", BASE_URL)
         self.api_url = f"{self.base_url}/api/navigation/{self.year_path}"
 
+    def _course(self, course_path: str, title: str) -> Course:
+        """
+        Get the Course for a path, reusing the registered one if there is one.
+        """
+        if self.registry is None:
+            return Course(self.session, course_path, title, self)
+        course = self.registry.get("group", course_path)
+        if course is None:
+            course = self.registry.put(
+                "group", course_path, Course(self.session, course_path, title, self)
+            )
+        return course
+
     def all_courses(self) -> list:
         """
         Gets all visible courses in this year.
         """
+        if self.registry is not None:
+            courses = self.registry.get("courses", self.year_path)
+            if courses is not None:
+                return list(courses)
+
         response = self.session.get(self.api_url)
         if response.status_code != 200:
             raise ConnectionError(f"Failed to retrieve courses for {self.year_path}.")
 
-        courses_data = response.json()
+        with parsing(response):
+            courses_data = response.json()
         courses = []
         for course_info in courses_data:
             if course_info.get("visible", False):
                 course_path = course_info["path"]
                 course_title = course_info["title"]
-                courses.append(Course(self.session, course_path, course_title, self))
-        return courses
+                courses.append(self._course(course_path, course_title))
+
+        if self.registry is not None:
+            self.registry.put("courses", self.year_path, courses)
+        return list(courses)
 
     def get_course(self, course_title: str) -> Course:
         """
@@ -51,25 +77,28 @@ class Year:
         course_path = f"/{self.year_path}/{course_tag}"
         course_url = f"{self.base_url}/course{course_path}"
 
+        if self.registry is not None:
+            course = self.registry.get("group", course_path)
+            if course is not None:
+                return course
+
         response = self.session.get(course_url)
         if response.status_code != 200:
             raise ConnectionError(
                 f"Failed to retrieve course '{course_tag}' for year {self.year_path}."
             )
 
-        soup = BeautifulSoup(response.text, "lxml")
-
-        title_elements = soup.find_all("a", class_="fill accent large")
-        title_element = title_elements[-1] if title_elements else None
-
-        if title_element:
-            course_title = title_element.get_text(strip=True)
-        else:
+        with parsing(response):
+            page = GroupPage.from_html(response.text)
+        if not page.title:
             raise ValueError(
                 f"Could not retrieve course title for tag '{course_tag}' in year {self.year_path}."
             )
 
-        return Course(self.session, course_path, course_title, self)
+        course = self._course(course_path, page.title)
+        if not course.is_loaded:
+            course._page = page  # pylint: disable=protected-access
+        return course
 
     def __str__(self):
         return f"Year({self.year_path})"
@@ -0,0 +1,64 @@
+"""
+Shared fixtures. The helpers in benchmarks/ (fixture pages, stand-in
+server) are importable from the tests.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+# pylint: disable=wrong-import-position
+from bench_fixtures import offline_session
+from standin import Config, StandinServer
+from temmies.themis import Themis
+
+USER = "s0000001"
+PASSWORD = "password"
+
+
+class Client(Themis):  # pylint: disable=too-few-public-methods
+    """
+    Themis logging in to the stand-in, without the keyring.
+    """
+
+    def _get_password(self) -> str:
+        return PASSWORD
+
+
+@pytest.fixture
+def session():
+    """
+    A requests session answered from the pages in benchmarks/fixtures/.
+    """
+    return offline_session()
+
+
+@pytest.fixture
+def standin():
+    """
+    A running stand-in; change `standin.config` to change its behaviour.
+    """
+    server = StandinServer(Config(judge_delay=0.2)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def connect(standin):  # pylint: disable=redefined-outer-name
+    """
+    Function creating Themis instances logged in to the stand-in
+    (browserless, as USER); they are closed afterwards.
+    """
+    instances = []
+
+    def connect(cls=Client, **kwargs):  # pylint: disable=redefined-outer-name
+        themis = cls(**{"user": USER, "browserless": True, "base_url": standin.url, **kwargs})
+        instances.append(themis)
+        return themis
+
+    yield connect
+    for themis in instances:
+        themis.close()
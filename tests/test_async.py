@@ -0,0 +1,83 @@
+"""
+AsyncThemis against the stand-in, reusing the cookies of a Themis instance.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+from standin import COURSE
+
+from temmies.download import FILE_MODE
+from temmies.exceptions import SessionExpired
+from temmies.results import Backoff
+
+async_themis = pytest.importorskip("temmies.async_themis")
+
+
+def run(connect, scenario):
+    """
+    Run `scenario(course)` with an AsyncCourse for the stand-in course.
+    """
+    async def main():
+        async with async_themis.AsyncThemis(connect()) as client:
+            return await scenario(async_themis.AsyncCourse(client, COURSE, "Stand-in Course"))
+    return asyncio.run(main())
+
+
+async def first_assignment(course):
+    group = (await course.get_items())[0]
+    return (await group.get_items())[0]
+
+
+def test_get_items(standin, connect):
+    async def scenario(course):
+        return [item.title for item in await course.get_items()]
+    assert run(connect, scenario) == [f"Group {g}" for g in range(1, 5)]
+
+
+def test_download(standin, connect, tmp_path):
+    async def scenario(course):
+        assignment = await first_assignment(course)
+        return (
+            await assignment.download_tcs(str(tmp_path)),
+            await assignment.download_files(str(tmp_path)),
+        )
+    tcs, files = run(connect, scenario)
+    assert tcs.ok and files.ok
+    assert len(tcs) == 8 and len(files) == 1
+    for path in tcs + files:
+        with open(path, "rb") as f:
+            content = f.read()
+        assert len(content) == standin.config.file_size
+        assert content.startswith(b"/file/")
+        assert os.stat(path).st_mode & 0o777 == FILE_MODE
+
+
+def test_submit(standin, connect, tmp_path):
+    source = tmp_path / "solution.py"
+    source.write_text("print(input())\n")
+
+    async def scenario(course):
+        assignment = await first_assignment(course)
+        return await assignment.submit([str(source)], backoff=Backoff(0.1, 0.2), timeout=30)
+    assert run(connect, scenario) == {1: True, 2: True, 3: True, 4: True}
+
+
+def test_expired_session(standin, connect, tmp_path):
+    async def scenario(course):
+        assignment = await first_assignment(course)
+        await assignment.load()
+        standin.config.expire_after = 0.2
+        time.sleep(0.2)
+        result = await assignment.download_tcs(str(tmp_path))
+        with pytest.raises(SessionExpired):
+            await course.get_items()
+        return result
+
+    result = run(connect, scenario)
+    assert not result and len(result.failed) == 8
+    assert all(isinstance(failure["error"], SessionExpired) for failure in result.failed)
+    # Nothing, not even the sign-on page, was written
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,89 @@
+"""
+The on-disk page cache, through a Themis instance talking to the stand-in.
+"""
+
+import os
+
+from standin import COURSE
+
+from temmies.cache import HTTPCache
+
+
+def navigation(themis) -> str:
+    return f"{themis.base_url}/api/navigation{COURSE}"
+
+
+def test_fresh_pages_come_from_the_cache(connect, standin, tmp_path):
+    themis = connect(cache_dir=str(tmp_path))
+    first = themis.session.get(navigation(themis))
+    requests = standin.stats.counts["requests"]
+    second = themis.session.get(navigation(themis))
+    assert second.json() == first.json()
+    assert standin.stats.counts["requests"] == requests
+    assert themis.stats()["cache"]["hit"] == 1
+
+
+def test_stale_pages_are_revalidated(connect, standin, tmp_path):
+    themis = connect(cache_dir=str(tmp_path), cache_ttl=0)
+    first = themis.session.get(navigation(themis))
+    second = themis.session.get(navigation(themis))
+    assert second.json() == first.json()
+    assert standin.stats.counts["304"] == 1
+    assert themis.stats()["cache"]["revalidated"] == 1
+
+
+def test_status_pages_are_not_cached(connect, tmp_path):
+    themis = connect(cache_dir=str(tmp_path))
+    assert not themis.cache.accepts(f"{themis.base_url}/stats{COURSE}/group1/assignment1")
+
+
+def test_entries_are_kept_per_user(connect, tmp_path):
+    first = connect(cache_dir=str(tmp_path))
+    first.session.get(navigation(first))
+    other = HTTPCache(str(tmp_path), namespace="s0000002")
+    assert other.directory != first.cache.directory
+    assert len(first.cache) == 1
+    assert other.lookup(navigation(first)) is None
+
+
+def test_hits_do_not_rewrite_the_index(connect, tmp_path):
+    themis = connect(cache_dir=str(tmp_path))
+    themis.session.get(navigation(themis))
+    themis.cache.close()
+    index = os.path.join(themis.cache.directory, HTTPCache.INDEX)
+    with open(index, "rb") as f:
+        stored = f.read()
+
+    for _ in range(3):
+        themis.session.get(navigation(themis))
+    with open(index, "rb") as f:
+        assert f.read() == stored
+
+    themis.cache.close()
+    with open(index, "rb") as f:
+        assert f.read() != stored
+
+
+def test_stores_do_not_rewrite_the_index(connect, tmp_path):
+    themis = connect(cache_dir=str(tmp_path))
+    themis.session.get(navigation(themis))
+    index = os.path.join(themis.cache.directory, HTTPCache.INDEX)
+    assert not os.path.exists(index)
+
+    themis.cache.close()
+    reopened = HTTPCache(str(tmp_path), namespace=themis.user)
+    assert reopened.lookup(navigation(themis)) is not None
+    assert reopened.size == themis.cache.size > 0
+
+
+def test_bodies_missing_from_the_index_are_removed(tmp_path):
+    orphan = tmp_path / ("0" * 64)
+    orphan.write_bytes(b"page")
+    assert len(HTTPCache(str(tmp_path))) == 0
+    assert not orphan.exists()
+
+
+def test_directory_is_private(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache"), namespace="s0000001")
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+    assert os.stat(tmp_path / "cache").st_mode & 0o777 == 0o700
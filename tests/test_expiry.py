@@ -0,0 +1,71 @@
+"""
+Detection of an expired session, logging in again and replaying the
+request, against the stand-in (which redirects to /login once a session
+is older than `expire_after`).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from standin import COURSE
+
+from temmies.exceptions import SessionExpired
+from temmies.session import login_required
+
+
+def expire(standin, seconds: float = 0.2) -> None:
+    """
+    Make the current and future sessions of the stand-in expire after `seconds`.
+    """
+    standin.config.expire_after = seconds
+    time.sleep(seconds)
+
+
+def test_requests_are_replayed_after_logging_in_again(connect, standin):
+    themis = connect()
+    expire(standin)
+    items = themis.get_by_path(COURSE).get_items()
+    assert [item.title for item in items] == [f"Group {g}" for g in range(1, 5)]
+    assert standin.stats.counts["logins"] == 2
+    assert themis.stats()["retries"] >= 1
+
+
+def test_threads_share_one_login(connect, standin):
+    themis = connect()
+    url = f"{themis.base_url}/api/navigation{COURSE}"
+    standin.config.expire_after = 1
+    time.sleep(1)
+    with ThreadPoolExecutor(8) as pool:
+        statuses = list(pool.map(lambda _: themis.session.get(url).status_code, range(8)))
+    assert statuses == [200] * 8
+    assert standin.stats.counts["logins"] == 2
+
+
+def test_gives_up_if_logging_in_does_not_help(connect, standin):
+    themis = connect()
+    expire(standin, 0)
+    with pytest.raises(SessionExpired):
+        themis.session.get(f"{themis.base_url}/api/navigation{COURSE}")
+
+
+def response(status: int = 200, body: bytes = b"", content_type: str = "text/html") -> requests.Response:
+    result = requests.Response()
+    result.status_code = status
+    result.url = "https://themis.housing.rug.nl/course/2024-2025"
+    result.headers["Content-Type"] = content_type
+    result._content = body  # pylint: disable=protected-access
+    return result
+
+
+def test_login_required():
+    assert not login_required(response())
+    assert login_required(response(403))
+    assert login_required(response(body=b'<a href="https://signon.rug.nl/nidp">'))
+    # Only non-streamed HTML bodies are looked at
+    assert not login_required(response(body=b"signon.rug.nl", content_type="text/plain"))
+    assert not login_required(response(body=b"signon.rug.nl"), stream=True)
+    redirected = response(302)
+    redirected.headers["Location"] = "/login"
+    assert login_required(redirected)
@@ -0,0 +1,51 @@
+"""
+Extraction from the recorded pages in benchmarks/fixtures/, benchmarked
+with pytest-benchmark. Run `pytest --benchmark-disable` to only check it.
+"""
+
+import pytest
+from bench_fixtures import (
+    fixture, load_course, load_group, load_status, load_submission, memory_per_object,
+)
+
+from temmies.results import parse_results
+
+
+def test_group(benchmark, session):
+    group = benchmark(load_group, session)
+    benchmark.extra_info["bytes_per_object"] = memory_per_object(lambda: load_group(session))
+    assert len(group.get_test_cases()) == 20
+    assert [f["title"] for f in group.get_files()] == ["skeleton.c", "Makefile"]
+
+
+def test_course(benchmark, session):
+    course = benchmark(load_course, session)
+    benchmark.extra_info["bytes_per_object"] = memory_per_object(lambda: load_course(session))
+    assert len(course.get_items()) == 9
+
+
+def test_status(benchmark, session):
+    status = benchmark(load_status, session)
+    assert set(status) >= {"leading", "best", "latest", "first_pass", "last_pass"}
+    # The same submission is shared between the rows that link to it
+    assert status["leading"] is status["best"]
+
+
+def test_submission(benchmark, session):
+    submission = benchmark(load_submission, session)
+    benchmark.extra_info["bytes_per_object"] = memory_per_object(
+        lambda: load_submission(session)
+    )
+    assert len(submission.get_test_cases()) == 10
+    assert submission.get_files()[0][0] == "main.c"
+
+
+@pytest.mark.parametrize("state, done", [("queued", False), ("pending", False), ("done", True)])
+def test_results(benchmark, state, done):
+    html = fixture(f"result_{state}.html").decode()
+    results, finished = benchmark(parse_results, html)
+    assert finished is done
+    if state == "queued":
+        assert results == {}
+    if state == "done":
+        assert results[9] is False and results[10] is None
@@ -0,0 +1,23 @@
+"""
+`import temmies` stays fast: the login-only dependencies are deferred and
+the median import time is within budget (TEMMIES_IMPORT_BUDGET_MS, e.g.
+for slow CI machines).
+"""
+
+import os
+import statistics
+
+from import_time import BUDGET_MS, import_once
+
+RUNS = 5
+
+
+def test_login_dependencies_are_deferred():
+    _, loaded = import_once()
+    assert loaded == []
+
+
+def test_import_time_within_budget():
+    budget = float(os.environ.get("TEMMIES_IMPORT_BUDGET_MS", BUDGET_MS))
+    median = statistics.median(import_once()[0] for _ in range(RUNS))
+    assert median <= budget, f"import temmies took {median:.1f} ms, budget {budget:.0f} ms"
@@ -0,0 +1,54 @@
+"""
+The browserless SAML login (temmies.saml) against the stand-in's sign-on.
+"""
+
+import pytest
+import requests
+from conftest import PASSWORD, USER, Client
+
+from temmies.exceptions import SessionExpired, TwoFactorRequired
+from temmies.saml import saml_login
+from temmies.themis import REMOVED_PASSWORD
+
+
+def test_login(connect, standin):
+    themis = connect()
+    assert themis.check_session()
+    assert standin.stats.counts["logins"] == 1
+    assert themis.password == REMOVED_PASSWORD
+
+
+def test_rejected_password(standin):
+    standin.config.password = "other"
+    with pytest.raises(SessionExpired):
+        saml_login(requests.Session(), standin.url, USER, PASSWORD)
+    assert "logins" not in standin.stats.counts
+
+
+def test_password_is_cleared_when_logging_in_again_fails(connect, standin):
+    themis = connect()
+    standin.config.password = "other"
+    with pytest.raises(SessionExpired):
+        themis.refresh_cookies()
+    assert themis.password == REMOVED_PASSWORD
+
+
+def test_two_factor(standin):
+    standin.config.two_factor = True
+    with pytest.raises(TwoFactorRequired):
+        saml_login(requests.Session(), standin.url, USER, PASSWORD)
+
+
+def test_two_factor_falls_back_to_the_browser(connect, standin, monkeypatch):
+    standin.config.two_factor = True
+    passwords = []
+
+    def browser_login(themis, session):
+        passwords.append(themis.password)
+        raise SessionExpired("no browser in the tests")
+
+    monkeypatch.setattr(Client, "_Themis__browser_login", browser_login)
+    with pytest.raises(SessionExpired):
+        connect()
+    # The browser gets the password back, not the placeholder
+    assert passwords == [PASSWORD]
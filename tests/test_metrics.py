@@ -0,0 +1,45 @@
+"""
+Request records and Themis.stats(), against the stand-in.
+"""
+
+from standin import COURSE
+
+from temmies.results import Backoff
+
+
+def assignment(themis):
+    return next(item for item in themis.get_by_path(COURSE).walk() if item.submitable)
+
+
+def test_downloads_are_recorded_right_away(connect, tmp_path):
+    records = []
+    themis = connect(on_request=records.append)
+    group = assignment(themis)
+    group.load()
+    records.clear()
+    result = group.download_tcs(str(tmp_path), workers=4)
+    assert len(result) == 8
+    # Before stats(), which would complete anything still waiting
+    downloads = [r for r in records if r.template == "/file/{path}"]
+    assert len(downloads) == 8
+    assert all(r.operation == "download_tcs" and r.status == 200 for r in downloads)
+
+
+def test_streamed_results_count_towards_submit(connect, tmp_path):
+    records = []
+    themis = connect(on_request=records.append)
+    group = assignment(themis)
+    source = tmp_path / "solution.py"
+    source.write_text("print(input())\n")
+    records.clear()
+
+    results = group.submit([str(source)], wait="stream", backoff=Backoff(0.1, 0.2), timeout=30)
+    # The submission is recorded once submit returns, before any poll
+    assert [r.template for r in records if r.method == "POST"] == ["/submit/{path}"]
+    assert all(passed for _, passed in results)
+
+    polls = [r for r in records if r.template == "/result/{path}"]
+    assert polls and all(r.operation == "submit" for r in polls)
+    submit = themis.stats()["operations"]["submit"]
+    assert submit["calls"] == 1
+    assert submit["wall"] >= 0.2
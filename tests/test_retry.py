@@ -0,0 +1,142 @@
+"""
+Throttling and retries of ThrottledAdapter, against a local server that
+answers with a scripted sequence of statuses.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from temmies.ratelimit import AdaptiveConcurrency, RateLimiter
+from temmies.results import Backoff
+from temmies.session import ThemisSession, ThrottledAdapter, retry_after
+
+
+class ScriptedServer(ThreadingHTTPServer):
+    """
+    Answers each request with the next (status, headers) of `script`,
+    then with 200s. `methods` records the method of every request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.script: list[tuple[int, dict]] = []
+        self.methods: list[str] = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    server: ScriptedServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def answer(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.methods.append(self.command)
+            status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_POST = answer
+
+
+@pytest.fixture
+def server():
+    server = ScriptedServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def throttled_session(retries: int = 3, max_retry_after: float = 120) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", ThrottledAdapter(
+        RateLimiter(None), AdaptiveConcurrency(4), retries,
+        backoff=Backoff(initial=0.01, maximum=0.01, jitter=0), max_retry_after=max_retry_after,
+    ))
+    return session
+
+
+def test_retries_transient_errors(server):
+    server.script = [(503, {}), (502, {}), (504, {})]
+    response = throttled_session().get(server.url)
+    assert response.status_code == 200
+    assert server.methods == ["GET"] * 4
+
+
+def test_gives_up_after_retries(server):
+    server.script = [(503, {})] * 3
+    response = throttled_session(retries=2).get(server.url)
+    assert response.status_code == 503
+    assert len(server.methods) == 3
+
+
+def test_does_not_repeat_a_post_that_may_have_been_processed(server):
+    server.script = [(503, {})]
+    response = throttled_session().post(server.url, data={"file": "x"})
+    assert response.status_code == 503
+    assert server.methods == ["POST"]
+
+
+def test_repeats_a_throttled_post(server):
+    server.script = [(429, {"Retry-After": "0"})]
+    response = throttled_session().post(server.url, data={"file": "x"})
+    assert response.status_code == 200
+    assert server.methods == ["POST", "POST"]
+
+
+def test_does_not_wait_for_a_long_retry_after(server):
+    server.script = [(429, {"Retry-After": "3600"})]
+    response = throttled_session(max_retry_after=60).get(server.url)
+    assert response.status_code == 429
+    assert len(server.methods) == 1
+
+
+def test_retries_are_recorded(server):
+    server.script = [(503, {"Retry-After": "0"})]
+    session = ThemisSession(base_url=server.url)
+    assert session.get(server.url).status_code == 200
+    assert session.metrics.stats()["retries"] == 1
+
+
+def test_retry_after():
+    response = requests.Response()
+    response.headers["Retry-After"] = "2"
+    assert retry_after(response) == 2
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert retry_after(response) == 0
+    response.headers["Retry-After"] = "soon"
+    assert retry_after(response) is None
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(50, burst=1)
+    limiter.acquire()
+    waited = sum(limiter.acquire() for _ in range(5))
+    assert waited >= 5 / 50 * 0.9
+
+
+def test_concurrency_halves_under_stress_and_recovers():
+    concurrency = AdaptiveConcurrency(8, cooldown=0)
+    concurrency.acquire()
+    concurrency.release(stressed=True)
+    assert concurrency.limit == 4
+    for _ in range(4):
+        concurrency.acquire()
+        concurrency.release()
+    assert concurrency.limit == 5
@@ -0,0 +1,31 @@
+"""
+Course.get_all_statuses against the stand-in.
+"""
+
+from standin import COURSE
+
+from temmies.group import Group
+
+
+def test_all_statuses(connect):
+    matrix = connect().get_by_path(COURSE).get_all_statuses(concurrency=4)
+    assert len(matrix) == 4 * 5
+    assert matrix.paths[0] == f"{COURSE}/group1/ex1"
+    assert matrix.errors == [None] * len(matrix)
+    assert all(value == "passed" for value in matrix["leading"])
+
+
+def test_failed_listing_fails_only_its_group(connect, monkeypatch):
+    get_items = Group.get_items
+
+    def flaky_get_items(group):
+        if group.path.rstrip("/").endswith("/group2"):
+            raise ConnectionError("Failed to list group2.")
+        return get_items(group)
+
+    monkeypatch.setattr(Group, "get_items", flaky_get_items)
+    matrix = connect().get_by_path(COURSE).get_all_statuses(concurrency=4)
+    assert len(matrix) == 3 * 5 + 1
+    failed = [path for path, error in zip(matrix.paths, matrix.errors) if error]
+    assert failed == [f"{COURSE}/group2"]
+    assert "group2" in matrix.errors[matrix.paths.index(failed[0])]
@@ -0,0 +1,67 @@
+"""
+Incremental mirrors of a stand-in course with Course.sync.
+"""
+
+import os
+
+import pytest
+from standin import COURSE
+
+from temmies.download import FILE_MODE
+
+
+@pytest.fixture
+def course(connect, standin):
+    standin.config.groups = 2
+    standin.config.assignments = 2
+    return connect().get_by_path(COURSE)
+
+
+# 2 groups of 2 assignments, each with 4 test cases (in and out) and a file
+FILES = 2 * 2 * (4 * 2 + 1)
+
+
+def test_first_sync_adds_everything(course, tmp_path):
+    result = course.sync(str(tmp_path))
+    assert result.ok
+    assert len(result.added) == len(result) == FILES
+    assert all(os.path.isfile(path) for path in result.added)
+    # Like files created with open(), not the owner-only temporary files
+    assert all(os.stat(path).st_mode & 0o777 == FILE_MODE for path in result.added)
+
+
+def test_unchanged_files_are_not_downloaded_again(course, standin, tmp_path):
+    course.sync(str(tmp_path))
+    result = course.sync(str(tmp_path))
+    assert result.ok
+    assert len(result.unchanged) == FILES
+    assert not result.added and not result.updated and not list(result)
+    assert standin.stats.counts["304"] == FILES
+
+
+def test_changed_files_are_updated(course, standin, tmp_path):
+    course.sync(str(tmp_path))
+    standin.config.file_size = 2048
+    result = course.sync(str(tmp_path))
+    assert len(result.updated) == 2 * 2 * 4 * 2 + 2 * 2
+    assert all(os.path.getsize(path) == 2048 for path in result.updated)
+
+
+@pytest.mark.parametrize("delete", [False, True])
+def test_files_gone_remotely_are_removed_on_request(course, connect, standin, tmp_path, delete):
+    course.sync(str(tmp_path))
+    standin.config.assignments = 1
+    result = connect().get_by_path(COURSE).sync(str(tmp_path), delete=delete)
+    assert result.ok
+    assert len(result.removed) == FILES // 2
+    assert all(os.path.exists(path) != delete for path in result.removed)
+
+
+def test_files_that_failed_are_not_removed(course, standin, tmp_path):
+    course.sync(str(tmp_path))
+    # The course still lists the second assignments, whose files are now gone
+    standin.config.assignments = 1
+    result = course.sync(str(tmp_path), delete=True)
+    assert len(result.failed) == FILES // 2
+    assert not result.removed
+    assert all(os.path.isfile(failure["destination"]) for failure in result.failed)